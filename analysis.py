@@ -175,6 +175,8 @@ except ImportError:
 
 import seaborn as sns
 
+from gallery import FaceGallery
+
 # Proje yolları
 DATASET_DIR = "dataset"
 ENCODINGS_FILE = "encodings/face_encodings.pickle"
@@ -185,15 +187,13 @@ if not os.path.exists(RESULTS_DIR):
     os.makedirs(RESULTS_DIR)
 
 
-def load_encodings():
-    """Kayıtlı encoding'leri yükle"""
+def load_gallery():
+    """Kayıtlı encoding'leri FaceGallery olarak yükle"""
     if not os.path.exists(ENCODINGS_FILE):
         print("[HATA] Encoding dosyası bulunamadı!")
         return None
     
-    with open(ENCODINGS_FILE, "rb") as f:
-        data = pickle.load(f)
-    return data
+    return FaceGallery.load(ENCODINGS_FILE)
 
 
 def create_test_data():
@@ -205,32 +205,31 @@ def create_test_data():
     print(" TEST VERİSİ OLUŞTURULUYOR")
     print("="*60)
     
-    data = load_encodings()
-    if data is None:
+    gallery = load_gallery()
+    if gallery is None:
         return None, None, None
     
-    known_encodings = data["encodings"]
-    known_names = data["names"]
-    known_ids = data["ids"]
-    
-    print(f"[INFO] {len(known_encodings)} kayıtlı yüz bulundu.")
+    print(f"[INFO] {gallery.n_templates} kayıtlı yüz bulundu ({len(gallery)} öğrenci).")
     
     y_true = []  # Gerçek etiketler
     y_pred = []  # Tahmin edilen etiketler
     y_scores = []  # Güven skorları (mesafe)
     
-    # Her encoding'i diğerleriyle karşılaştır
-    for i, (enc, name, sid) in enumerate(zip(known_encodings, known_names, known_ids)):
+    # Tüm şablonları tek seferde birbirleriyle karşılaştır
+    all_distances = gallery.template_distances(gallery.templates)
+    template_names = gallery.template_names
+    template_ids = gallery.ids[gallery.template_owner]
+    
+    for i in range(gallery.n_templates):
+        name, sid = str(template_names[i]), str(template_ids[i])
         print(f"[TEST] {name} ({sid}) test ediliyor...")
         
-        # Bu encoding'i tüm kayıtlı encoding'lerle karşılaştır
-        distances = face_recognition.face_distance(known_encodings, enc)
-        
         # En yakın eşleşmeyi bul
+        distances = all_distances[i]
         min_idx = np.argmin(distances)
-        min_distance = distances[min_idx]
+        min_distance = float(distances[min_idx])
         
-        predicted_name = known_names[min_idx]
+        predicted_name = str(template_names[min_idx])
         
         y_true.append(name)
         y_pred.append(predicted_name)
@@ -249,15 +248,13 @@ def cross_validation_test():
     print(" CROSS-VALIDATION TESTİ")
     print("="*60)
     
-    data = load_encodings()
-    if data is None:
+    gallery = load_gallery()
+    if gallery is None:
         return None, None, None, None
     
-    known_encodings = np.array(data["encodings"])
-    known_names = np.array(data["names"])
-    known_ids = np.array(data["ids"])
+    known_names = gallery.template_names
     
-    n_samples = len(known_encodings)
+    n_samples = gallery.n_templates
     print(f"[INFO] {n_samples} örnek üzerinde test yapılıyor...")
     
     y_true = []
@@ -269,16 +266,17 @@ def cross_validation_test():
     # Tolerance değeri (main.py ile aynı)
     TOLERANCE = 0.50
     
+    # Tüm encoding'lerle karşılaştır (gerçek senaryo) — tek matris çarpımı
+    all_distances = gallery.template_distances(gallery.templates)
+    
     for i in range(n_samples):
-        test_encoding = known_encodings[i]
-        test_name = known_names[i]
+        test_name = str(known_names[i])
         
-        # Tüm encoding'lerle karşılaştır (gerçek senaryo)
-        distances = face_recognition.face_distance(known_encodings, test_encoding)
+        distances = all_distances[i]
         min_idx = np.argmin(distances)
-        min_distance = distances[min_idx]
+        min_distance = float(distances[min_idx])
         
-        predicted_name = known_names[min_idx]
+        predicted_name = str(known_names[min_idx])
         
         y_true.append(test_name)
         y_pred.append(predicted_name)
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+ANN_INDEX.PY - YAKLAŞIK EN YAKIN KOMŞU (IVF) İNDEKSİ
+==============================================================================
+Kampüs ölçeğinde (50k-500k öğrenci) galeriler için saf NumPy ile yazılmış
+IVF (Inverted File) indeksi.
+
+Çalışma Prensibi:
+1. Encoding'ler k-means ile `nlist` kabaca kümeye ayrılır
+2. Her kayıt en yakın merkezin listesine yazılır (satırlar listeye göre
+   sıralı tek bir matriste tutulur)
+3. Sorguda sadece en yakın `nprobe` kümenin kayıtları taranır
+
+GPU veya harici servis gerekmez. İndeks encode_faces.py tarafından
+oluşturulur ve face_encodings.pickle yanına kaydedilir.
+
+Kullanım:
+    python ann_index.py --benchmark              # Recall / gecikme tablosu
+    python ann_index.py --benchmark --n 200000   # Sentetik 200k galeri
+==============================================================================
+"""
+
+import os
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from utils import (
+    ANN_INDEX_FILE,
+    face_distance_matrix,
+    print_header,
+    print_info,
+    print_success,
+    print_warning,
+    print_error,
+)
+
+# Bu boyutun altındaki galerilerde tam arama zaten yeterince hızlı
+ANN_MIN_GALLERY_SIZE = 5000
+
+# Varsayılan taranacak küme sayısı
+DEFAULT_NPROBE = 8
+
+# k-means eğitim ayarları
+KMEANS_ITERATIONS = 15
+KMEANS_MAX_TRAIN_POINTS = 100_000
+
+# Atama sırasında bellek kullanımını sınırlamak için parça boyutu
+ASSIGN_CHUNK = 8192
+
+
+def gallery_fingerprint(vectors: np.ndarray) -> np.ndarray:
+    """
+    Galerinin boyutunu ve içeriğini özetleyen küçük bir parmak izi.
+    Kaydedilmiş indeksin güncel galeriye ait olup olmadığını anlamak için
+    kullanılır.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return np.array(
+        [len(vectors), float(vectors.sum(dtype=np.float64)),
+         float(np.abs(vectors).sum(dtype=np.float64))],
+        dtype=np.float64,
+    )
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Her vektör için en yakın merkezin indeksini parça parça hesaplar."""
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = vectors[start:start + ASSIGN_CHUNK]
+        dist = face_distance_matrix(centroids, chunk, centroid_norms)
+        labels[start:start + ASSIGN_CHUNK] = np.argmin(dist, axis=1)
+    return labels
+
+
+def kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    n_iter: int = KMEANS_ITERATIONS,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Basit Lloyd k-means. Büyük galerilerde rastgele bir alt küme üzerinde
+    eğitilir.
+
+    Returns:
+        np.ndarray: (n_clusters x 128) float32 merkezler
+    """
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    if len(vectors) > KMEANS_MAX_TRAIN_POINTS:
+        train = vectors[rng.choice(len(vectors), KMEANS_MAX_TRAIN_POINTS, replace=False)]
+    else:
+        train = vectors
+
+    n_clusters = min(n_clusters, len(train))
+    centroids = train[rng.choice(len(train), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        labels = _nearest_centroid(train, centroids)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, train)
+        counts = np.bincount(labels, minlength=n_clusters).astype(np.float32)
+
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Boş kalan kümeleri rastgele noktalarla yeniden başlat
+        n_empty = int((~filled).sum())
+        if n_empty:
+            centroids[~filled] = train[rng.choice(len(train), n_empty, replace=False)]
+
+    return np.ascontiguousarray(centroids, dtype=np.float32)
+
+
+class IVFIndex:
+    """
+    IVF-Flat indeksi: kaba k-means merkezleri + ters listeler.
+
+    Attributes:
+        centroids: (nlist x 128) küme merkezleri
+        order: Listeye göre sıralı satır indeksleri (galeri satırı)
+        offsets: (nlist + 1) her listenin `order` içindeki başlangıcı
+        vectors: `order` sırasına göre dizilmiş float32 encoding'ler
+        nprobe: Varsayılan taranacak küme sayısı
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        order: np.ndarray,
+        offsets: np.ndarray,
+        vectors: np.ndarray,
+        fingerprint: np.ndarray,
+        nprobe: int = DEFAULT_NPROBE
+    ):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.centroid_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        self.order = np.asarray(order, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.fingerprint = np.asarray(fingerprint, dtype=np.float64)
+        self.nprobe = nprobe
+
+    # --------------------------------------------------------
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        nprobe: int = DEFAULT_NPROBE,
+        seed: int = 0
+    ) -> "IVFIndex":
+        """
+        Galeri encoding'lerinden indeks oluşturur.
+
+        Args:
+            vectors: (N x 128) encoding matrisi
+            nlist: Küme sayısı (varsayılan: ~4·√N)
+            nprobe: Sorguda taranacak küme sayısı
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if nlist is None:
+            nlist = max(1, int(4 * np.sqrt(len(vectors))))
+
+        centroids = kmeans(vectors, nlist, seed=seed)
+        labels = _nearest_centroid(vectors, centroids)
+
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=len(centroids))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        return cls(centroids, order, offsets, vectors[order],
+                   gallery_fingerprint(vectors), nprobe)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def matches_gallery(self, vectors: np.ndarray) -> bool:
+        """İndeksin verilen galeriden oluşturulup oluşturulmadığını kontrol eder."""
+        return np.allclose(self.fingerprint, gallery_fingerprint(vectors))
+
+    # --------------------------------------------------------
+    def search(
+        self,
+        queries: np.ndarray,
+        nprobe: Optional[int] = None,
+        k: int = 1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Her sorgu için yaklaşık en yakın `k` galeri satırını bulur.
+
+        Args:
+            queries: (F x 128) encoding'ler
+            nprobe: Taranacak küme sayısı (None ise self.nprobe)
+            k: Sorgu başına döndürülecek komşu sayısı
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (galeri_satırları, mesafeler) —
+            (F x k), yakından uzağa sıralı. Yeterli aday bulunamazsa boş
+            yerler satır -1, mesafe inf ile doldurulur.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, 128)
+        n_queries = len(queries)
+        best_rows = np.full((n_queries, k), -1, dtype=np.intp)
+        best_dist = np.full((n_queries, k), np.inf, dtype=np.float32)
+        if n_queries == 0 or len(self) == 0:
+            return best_rows, best_dist
+
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        coarse = face_distance_matrix(self.centroids, queries, self.centroid_norms)
+        probes = np.argpartition(coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+        for q in range(n_queries):
+            starts = self.offsets[probes[q]]
+            ends = self.offsets[probes[q] + 1]
+            candidates = np.concatenate(
+                [np.arange(s, e) for s, e in zip(starts, ends)]
+            )
+            if len(candidates) == 0:
+                continue
+
+            dist = face_distance_matrix(
+                self.vectors[candidates], queries[q:q + 1], self.sq_norms[candidates]
+            )[0]
+            n_found = min(k, len(candidates))
+            top = np.argpartition(dist, n_found - 1)[:n_found]
+            top = top[np.argsort(dist[top])]
+            best_rows[q, :n_found] = self.order[candidates[top]]
+            best_dist[q, :n_found] = dist[top]
+
+        return best_rows, best_dist
+
+    # --------------------------------------------------------
+    def save(self, path: str = ANN_INDEX_FILE) -> bool:
+        """İndeksi .npz dosyasına kaydeder."""
+        try:
+            np.savez(
+                path,
+                centroids=self.centroids,
+                order=self.order,
+                offsets=self.offsets,
+                vectors=self.vectors,
+                fingerprint=self.fingerprint,
+                nprobe=np.array(self.nprobe),
+            )
+            print_success(f"ANN indeksi kaydedildi: {path} "
+                          f"({self.nlist} küme, {len(self)} kayıt)")
+            return True
+        except Exception as e:
+            print_error(f"ANN indeksi kaydedilemedi: {str(e)}")
+            return False
+
+    @classmethod
+    def load(cls, path: str = ANN_INDEX_FILE) -> Optional["IVFIndex"]:
+        """Kaydedilmiş indeksi yükler; dosya yoksa None döner."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(
+                    data["centroids"], data["order"], data["offsets"],
+                    data["vectors"], data["fingerprint"], int(data["nprobe"]),
+                )
+        except Exception as e:
+            print_error(f"ANN indeksi yüklenemedi: {str(e)}")
+            return None
+
+
+def build_and_save_index(
+    vectors: np.ndarray,
+    force: bool = False,
+    path: str = ANN_INDEX_FILE
+) -> Optional[IVFIndex]:
+    """
+    Galeri yeterince büyükse (veya force=True) indeksi oluşturup kaydeder.
+    Küçük galerilerde eski indeks dosyası silinir; tam arama kullanılır.
+    """
+    if len(vectors) < ANN_MIN_GALLERY_SIZE and not force:
+        if os.path.exists(path):
+            os.remove(path)
+            print_info("Galeri küçük, eski ANN indeksi silindi (tam arama kullanılacak).")
+        return None
+
+    print_info(f"ANN indeksi oluşturuluyor ({len(vectors)} kayıt)...")
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors)
+    print_info(f"İndeks {time.perf_counter() - start:.1f} sn'de oluşturuldu.")
+    index.save(path)
+    return index
+
+
+# ============================================================================
+# RECALL / GECİKME BENCHMARK'I
+# ============================================================================
+def _synthetic_gallery(n: int, seed: int = 0) -> np.ndarray:
+    """Gerçek encoding dağılımına benzer (norm ~1) sentetik galeri."""
+    rng = np.random.default_rng(seed)
+    # Galeriyi birbirine yakın gruplar halinde üret (gerçek yüzler gibi)
+    n_groups = max(1, n // 50)
+    group_centers = rng.normal(0.0, 0.07, size=(n_groups, 128))
+    members = group_centers[rng.integers(0, n_groups, size=n)]
+    return (members + rng.normal(0.0, 0.04, size=(n, 128))).astype(np.float32)
+
+
+def run_benchmark(n: int = 50_000, n_queries: int = 500, noise: float = 0.03) -> None:
+    """
+    Tam aramaya karşı IVF recall@1 ve sorgu başına gecikme tablosu basar.
+    Dağıtım başına nprobe seçimi için kullanılır.
+    """
+    from gallery import FaceGallery
+
+    print_header("ANN BENCHMARK (IVF vs TAM ARAMA)")
+
+    gallery = FaceGallery.load()
+    if gallery is not None and len(gallery) >= n:
+        vectors = gallery.centroids
+        print_info(f"Gerçek galeri kullanılıyor: {len(vectors)} kayıt")
+    else:
+        vectors = _synthetic_gallery(n)
+        print_info(f"Sentetik galeri kullanılıyor: {len(vectors)} kayıt")
+
+    rng = np.random.default_rng(1)
+    rows = rng.integers(0, len(vectors), size=n_queries)
+    queries = vectors[rows] + rng.normal(0.0, noise, size=(n_queries, 128)).astype(np.float32)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors)
+    print_info(f"İndeks oluşturma: {time.perf_counter() - start:.2f} sn "
+               f"({index.nlist} küme)")
+
+    # Tam arama (referans)
+    labels = np.arange(len(vectors)).astype(str)
+    exact = FaceGallery(vectors, labels, labels)
+    start = time.perf_counter()
+    exact_rows, _, _ = exact.match(queries, tolerance=1.0)
+    exact_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    print(f"\n  {'nprobe':>8} {'recall@1':>10} {'ms/sorgu':>10} {'hızlanma':>10}")
+    print("  " + "-" * 42)
+    print(f"  {'tam':>8} {1.0:>10.3f} {exact_ms:>10.3f} {1.0:>9.1f}x")
+
+    nprobe = 1
+    while nprobe <= index.nlist:
+        start = time.perf_counter()
+        ann_rows = index.search(queries, nprobe=nprobe)[0][:, 0]
+        ann_ms = (time.perf_counter() - start) * 1000 / n_queries
+        recall = float(np.mean(ann_rows == exact_rows))
+        print(f"  {nprobe:>8} {recall:>10.3f} {ann_ms:>10.3f} {exact_ms / ann_ms:>9.1f}x")
+        if recall >= 0.999:
+            break
+        nprobe *= 2
+
+    print("\n  Not: utils.py'deki ANN_NPROBE, hedef recall'a ulaşan en küçük değere ayarlanmalı.")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    if "--benchmark" in args:
+        n = int(args[args.index("--n") + 1]) if "--n" in args else 50_000
+        q = int(args[args.index("--queries") + 1]) if "--queries" in args else 500
+        run_benchmark(n, q)
+    else:
+        print("Kullanım:")
+        print("  python ann_index.py --benchmark [--n 50000] [--queries 500]")
+        if not os.path.exists(ANN_INDEX_FILE):
+            print_warning(f"Kayıtlı indeks yok: {ANN_INDEX_FILE}")
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+ATTENDANCE_REPORT.PY - DÖNEM BOYU YOKLAMA RAPORU
+==============================================================================
+Seçili yoklama backend'indeki (utils.get_attendance_backend: CSV günlüğü
+veya SQLite) tüm günleri tarar ve öğrenci x gün devam matrisini, öğrenci
+bazlı devam oranlarını ve gün bazlı sayımları üretir.
+
+Adımlar:
+1. Tarama: günler backend.dates() ile listelenir; değişiklik anahtarı
+   backend.version() (günlükte dosya mtime'ı, SQLite'ta son satır id'si)
+2. Ayrıştırma: önbellekte olmayan veya değişmiş günler süreç havuzunda
+   paralel okunur (backend.read) ve her gün attendance/_report_cache/
+   altında sütunlu, sıkıştırılmış bir .npz dosyasına yazılır. Tekrar
+   çalıştırınca sadece yeni / değişen günler ayrıştırılır. Sadece eski
+   .xlsx dosyası olan (hiç yazılmamış, sürümü olmayan) günler bir kez
+   ayrıştırılır
+3. Birleştirme: gün dosyaları (numara, ad, geldi) sütunlarından tek bir
+   uint8 öğrenci x gün matrisi kurulur. Encoding dosyasındaki kayıtlı
+   öğrenciler hiç gelmemiş olsalar da rapora girer
+4. Çıktı: ozet.csv, matris.csv, gunluk.csv (ve rapor.xlsx)
+
+Kullanım:
+    python attendance_report.py
+    python attendance_report.py --start 2025_09_01 --end 2026_01_31 --min-rate 0.7
+==============================================================================
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import (
+    EXCEL_COLUMNS,
+    STATUS_PRESENT,
+    AttendanceBackend,
+    JournalBackend,
+    SQLiteBackend,
+    get_attendance_backend,
+    load_encodings,
+    print_error,
+    print_header,
+    print_info,
+    print_success,
+    print_warning,
+)
+
+# ============================================================================
+# AYARLAR
+# ============================================================================
+CACHE_DIR_NAME = "_report_cache"
+CACHE_INDEX_NAME = "index.json"
+REPORT_DIR_NAME = "rapor"
+
+DEFAULT_MIN_RATE = 0.7            # Bu oranın altındaki öğrenciler listelenir
+
+
+# ============================================================================
+# TARAMA VE AYRIŞTIRMA (PARALEL + ÖNBELLEK)
+# ============================================================================
+def _backend_spec(backend: AttendanceBackend) -> Optional[Tuple[str, str]]:
+    """İşçi süreçte aynı backend'i yeniden açmak için (ad, konum); bilinmiyorsa None."""
+    if isinstance(backend, SQLiteBackend):
+        return backend.name, backend.path
+    if isinstance(backend, JournalBackend):
+        return backend.name, backend.directory
+    return None
+
+
+_WORKER_BACKEND: Optional[AttendanceBackend] = None
+
+
+def _worker_backend(spec: Tuple[str, str]) -> AttendanceBackend:
+    """İşçi süreç başına tek backend (SQLite bağlantısı gün başına açılmasın)."""
+    global _WORKER_BACKEND
+    if _WORKER_BACKEND is None:
+        name, location = spec
+        _WORKER_BACKEND = SQLiteBackend(location) if name == "sqlite" else JournalBackend(location)
+    return _WORKER_BACKEND
+
+
+def _write_day_cache(backend: AttendanceBackend, date: str, cache_path: str) -> int:
+    """Bir günü backend'den okur ve sütunlu önbellek dosyasına yazar."""
+    df = pd.DataFrame(backend.read(date), columns=EXCEL_COLUMNS).fillna("")
+    tmp = cache_path + ".tmp.npz"
+    np.savez_compressed(
+        tmp,
+        ids=df["Numara"].astype(str).str.strip().to_numpy(dtype=str),
+        names=df["Ad Soyad"].astype(str).to_numpy(dtype=str),
+        present=(df["Durum"] == STATUS_PRESENT).to_numpy(dtype=bool),
+    )
+    os.replace(tmp, cache_path)
+    return len(df)
+
+
+def _parse_day(job: Tuple[Tuple[str, str], str, str]) -> Tuple[str, int, Optional[str]]:
+    """
+    İşçi süreçte bir günü okur ve sütunlu önbellek dosyasına yazar.
+
+    Returns:
+        (gün, kayıt_sayısı, hata_mesajı veya None)
+    """
+    spec, date, cache_path = job
+    try:
+        return date, _write_day_cache(_worker_backend(spec), date, cache_path), None
+    except Exception as e:
+        return date, 0, str(e)
+
+
+def update_cache(
+    backend: Optional[AttendanceBackend] = None,
+    workers: int = 0
+) -> Dict[str, str]:
+    """
+    Önbelleği backend'le eşitler; sadece yeni / değişen günleri ayrıştırır.
+
+    Args:
+        backend: Okunacak backend (varsayılan: get_attendance_backend())
+        workers: Süreç sayısı (0 = çekirdek sayısı)
+
+    Returns:
+        Dict[str, str]: {gün: önbellek_dosyası} (ayrıştırılamayanlar hariç)
+    """
+    backend = backend or get_attendance_backend()
+    cache_dir = os.path.join(backend.directory, CACHE_DIR_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, CACHE_INDEX_NAME)
+
+    index: Dict[str, Dict] = {}
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except Exception as e:
+            print_warning(f"Rapor önbellek dizini okunamadı, yeniden oluşturulacak: {str(e)}")
+
+    dates = backend.dates()
+    cache_files = {date: os.path.join(cache_dir, f"{date}.npz") for date in dates}
+    # Backend değişirse (ör. SQLite'a geçiş) tüm önbellek yenilenir
+    keys: Dict[str, Dict[str, Any]] = {
+        date: {"backend": backend.name, "version": backend.version(date)} for date in dates
+    }
+    stale = [
+        date for date in dates
+        if index.get(date) != keys[date] or not os.path.exists(cache_files[date])
+    ]
+    print_info(f"{len(dates)} gün, {len(dates) - len(stale)} önbellekte, "
+               f"{len(stale)} ayrıştırılacak")
+
+    if stale:
+        spec = _backend_spec(backend)
+        workers = min(workers or os.cpu_count() or 1, len(stale))
+        start = time.perf_counter()
+        if workers > 1 and spec is not None:
+            jobs = [(spec, date, cache_files[date]) for date in stale]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_parse_day, jobs))
+        else:
+            results = []
+            for date in stale:
+                try:
+                    results.append((date, _write_day_cache(backend, date, cache_files[date]), None))
+                except Exception as e:
+                    results.append((date, 0, str(e)))
+
+        rows = 0
+        for date, count, error in results:
+            if error is None:
+                index[date] = keys[date]
+                rows += count
+            else:
+                index.pop(date, None)
+                print_error(f"{date} okunamadı: {error}")
+        elapsed = time.perf_counter() - start
+        print_info(f"{len(stale)} gün / {rows} kayıt {elapsed:.2f} sn'de ayrıştırıldı")
+
+    # Backend'de artık olmayan günler önbellekten çıkar
+    for date in set(index) - set(dates):
+        del index[date]
+        if os.path.exists(os.path.join(cache_dir, f"{date}.npz")):
+            os.remove(os.path.join(cache_dir, f"{date}.npz"))
+
+    tmp = index_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, index_path)
+
+    return {date: cache_files[date] for date in sorted(index)}
+
+
+# ============================================================================
+# BİRLEŞTİRME
+# ============================================================================
+def load_roster() -> Dict[str, str]:
+    """Kayıtlı öğrenciler {numara: ad} (encoding dosyasından; yoksa boş)."""
+    data = load_encodings()
+    if data is None:
+        return {}
+    return {str(sid): name for name, sid in zip(data["names"], data["ids"])}
+
+
+def build_attendance_matrix(
+    cache_files: Dict[str, str],
+    roster: Optional[Dict[str, str]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> Tuple[List[str], List[str], List[str], np.ndarray]:
+    """
+    Öğrenci x gün devam matrisi.
+
+    Returns:
+        (numaralar, adlar, günler, matris) — matris[i, j] = 1 ise öğrenci i,
+        gün j'de geldi (uint8)
+    """
+    days = [d for d in sorted(cache_files) if (not start or d >= start) and (not end or d <= end)]
+    names: Dict[str, str] = dict(roster or {})
+    columns = []
+    for date in days:
+        with np.load(cache_files[date]) as data:
+            ids, day_names, present = data["ids"], data["names"], data["present"]
+        for sid, name in zip(ids.tolist(), day_names.tolist()):
+            names.setdefault(sid, name)
+        columns.append(ids[present])
+
+    student_ids = sorted(names)
+    row_of = {sid: i for i, sid in enumerate(student_ids)}
+    matrix = np.zeros((len(student_ids), len(days)), dtype=np.uint8)
+    for j, ids in enumerate(columns):
+        rows = np.fromiter((row_of[sid] for sid in ids.tolist()), dtype=np.int64, count=len(ids))
+        matrix[rows, j] = 1
+
+    return student_ids, [names[sid] for sid in student_ids], days, matrix
+
+
+def _display_date(date: str) -> str:
+    return datetime.strptime(date, "%Y_%m_%d").strftime("%d.%m.%Y")
+
+
+def attendance_report(
+    backend: Optional[AttendanceBackend] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    min_rate: float = DEFAULT_MIN_RATE,
+    workers: int = 0,
+    out_dir: Optional[str] = None,
+    write_xlsx: bool = True
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Raporu üretir ve out_dir altına yazar (varsayılan: backend klasöründe
+    rapor/).
+
+    Returns:
+        Dict veya None: {'summary', 'matrix', 'daily'} DataFrame'leri
+    """
+    print_header("DÖNEM BOYU YOKLAMA RAPORU")
+
+    backend = backend or get_attendance_backend()
+    cache_files = update_cache(backend, workers)
+    student_ids, names, days, matrix = build_attendance_matrix(
+        cache_files, load_roster(), start, end
+    )
+    if not days:
+        print_warning("Seçilen aralıkta yoklama günü yok.")
+        return None
+
+    present = matrix.sum(axis=1).astype(int)
+    rate = present / len(days)
+    summary = pd.DataFrame({
+        "Numara": student_ids,
+        "Ad Soyad": names,
+        "Geldiği Gün": present,
+        "Toplam Gün": len(days),
+        "Devam Oranı (%)": np.round(rate * 100, 1),
+    }).sort_values(["Devam Oranı (%)", "Numara"]).reset_index(drop=True)
+
+    day_labels = [_display_date(d) for d in days]
+    matrix_df = pd.DataFrame(matrix, columns=day_labels)
+    matrix_df.insert(0, "Ad Soyad", names)
+    matrix_df.insert(0, "Numara", student_ids)
+
+    day_present = matrix.sum(axis=0).astype(int)
+    daily = pd.DataFrame({
+        "Tarih": day_labels,
+        "Gelen": day_present,
+        "Oran (%)": np.round(day_present / max(1, len(student_ids)) * 100, 1),
+    })
+
+    out_dir = out_dir or os.path.join(backend.directory, REPORT_DIR_NAME)
+    os.makedirs(out_dir, exist_ok=True)
+    summary.to_csv(os.path.join(out_dir, "ozet.csv"), index=False, encoding="utf-8-sig")
+    matrix_df.to_csv(os.path.join(out_dir, "matris.csv"), index=False, encoding="utf-8-sig")
+    daily.to_csv(os.path.join(out_dir, "gunluk.csv"), index=False, encoding="utf-8-sig")
+    if write_xlsx:
+        xlsx_path = os.path.join(out_dir, "rapor.xlsx")
+        tmp = xlsx_path + ".tmp.xlsx"
+        with pd.ExcelWriter(tmp, engine="openpyxl") as writer:
+            summary.to_excel(writer, sheet_name="Özet", index=False)
+            matrix_df.to_excel(writer, sheet_name="Matris", index=False)
+            daily.to_excel(writer, sheet_name="Günlük", index=False)
+        os.replace(tmp, xlsx_path)
+
+    print_info(f"{day_labels[0]} - {day_labels[-1]}: {len(days)} gün, {len(student_ids)} öğrenci, "
+               f"ortalama devam %{rate.mean() * 100:.1f}")
+    low = summary[summary["Devam Oranı (%)"] < min_rate * 100]
+    if len(low):
+        print_warning(f"Devamı %{min_rate * 100:.0f} altında olan {len(low)} öğrenci:")
+        for _, row in low.iterrows():
+            print(f"  • {row['Ad Soyad']} ({row['Numara']}): "
+                  f"{row['Geldiği Gün']}/{row['Toplam Gün']} gün, %{row['Devam Oranı (%)']}")
+    print_success(f"Rapor yazıldı: {out_dir}")
+
+    return {"summary": summary, "matrix": matrix_df, "daily": daily}
+
+
+def _option(args: List[str], name: str, default, cast):
+    if name in args:
+        i = args.index(name)
+        value = cast(args[i + 1])
+        del args[i:i + 2]
+        return value
+    return default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    if "--help" in args or "-h" in args:
+        print("Kullanım:")
+        print("  python attendance_report.py")
+        print("      --start YYYY_MM_DD      Başlangıç günü (dahil)")
+        print("      --end YYYY_MM_DD        Bitiş günü (dahil)")
+        print(f"      --min-rate R            Listelenecek devam sınırı (varsayılan {DEFAULT_MIN_RATE})")
+        print("      --workers N             Süreç sayısı (varsayılan: çekirdek sayısı)")
+        print("      --out KLASÖR            Çıktı klasörü (varsayılan: attendance/rapor)")
+        print("      --no-xlsx               Sadece CSV yaz")
+        sys.exit(0)
+
+    write_xlsx = "--no-xlsx" not in args
+    if not write_xlsx:
+        args.remove("--no-xlsx")
+
+    result = attendance_report(
+        start=_option(args, "--start", None, str),
+        end=_option(args, "--end", None, str),
+        min_rate=_option(args, "--min-rate", DEFAULT_MIN_RATE, float),
+        workers=_option(args, "--workers", 0, int),
+        out_dir=_option(args, "--out", None, str),
+        write_xlsx=write_xlsx,
+    )
+    sys.exit(0 if result is not None else 1)
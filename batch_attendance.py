@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+BATCH_ATTENDANCE.PY - KAYITLI VİDEO / FOTOĞRAF KLASÖRÜNDEN YOKLAMA
+==============================================================================
+Ekran (GUI) gerektirmeyen toplu yoklama modu. Kayıtlı ders videolarından ve
+fotoğraf klasörlerinden belirli bir örnekleme hızıyla kare alır, yüzleri
+tanır ve canlı modla aynı yoklama kayıtlarını (mark_attendance) yazar.
+
+Kaydın günü ve saati çalıştırma anı değil, öğrencinin kayıtta ilk
+görüldüğü andır: fotoğraflarda dosyanın değiştirilme zamanı (mtime),
+videolarda kaydın başlangıcı (mtime - süre) + karenin video içindeki
+konumu. Dosya zamanları kopyalama sırasında bozulduysa --date / --time ile
+kaydın günü / başlangıç saati verilir.
+
+Paralellik:
+- Uzun videolar sabit süreli parçalara (segment) bölünür
+- Her parça ayrı bir süreçte çözülür (decode) ve tanınır
+- Fotoğraf klasörleri dosya grupları halinde dağıtılır
+- Her süreç dlib modellerini ve galeriyi bir kez yükler
+
+Kullanım:
+    python batch_attendance.py ders1.mp4 ders2.mp4 fotograflar/
+    python batch_attendance.py ders.mp4 --fps 2 --workers 6 --segment 300
+    python batch_attendance.py ders.mp4 --min-hits 3 --dry-run
+    python batch_attendance.py ders.mp4 --date 2025_10_14 --time 09:30
+==============================================================================
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import face_recognition
+except ImportError:
+    print("[HATA] face_recognition bulunamadı! pip install face_recognition")
+    sys.exit(1)
+
+from gallery import FaceGallery
+from utils import (
+    ANN_NPROBE,
+    CLAHE_CLIP_LIMIT,
+    FACE_MATCH_TOLERANCE,
+    PREPROCESS_CLAHE,
+    SCALE_FACTOR,
+    STATUS_PRESENT,
+    VALID_IMAGE_EXTENSIONS,
+    FramePreprocessor,
+    ensure_directories_exist,
+    mark_attendance,
+    materialize_attendance_excel,
+    print_error,
+    print_header,
+    print_info,
+    print_success,
+    print_warning,
+)
+
+# ============================================================================
+# AYARLAR
+# ============================================================================
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov", ".wmv", ".m4v"}
+
+DEFAULT_SAMPLE_FPS = 1.0       # Videodan saniyede örneklenecek kare
+DEFAULT_SEGMENT_SECONDS = 300  # Paralel işlenecek video parçası uzunluğu
+DEFAULT_MIN_HITS = 2           # Yoklamaya yazılmak için gereken tanınma sayısı
+IMAGE_CHUNK = 16               # Süreç başına gönderilen fotoğraf sayısı
+PHOTO_MAX_WIDTH = 1280         # Büyük fotoğraflar algılama öncesi bu genişliğe küçültülür
+
+# Bir iş: ("video", yol, başlangıç_karesi, bitiş_karesi, atlama, kayıt_başlangıcı)
+#         veya ("images", [(yol, çekim_zamanı), ...])
+Job = Tuple
+
+
+# ============================================================================
+# İŞÇİ SÜREÇ
+# ============================================================================
+_GALLERY = None
+_PREPROCESS = None
+
+
+def _worker_init() -> None:
+    """Her işçi süreçte galeriyi ve ön işleme tamponlarını bir kez hazırlar."""
+    global _GALLERY, _PREPROCESS
+    _GALLERY = FaceGallery.load() or FaceGallery.empty()
+    _PREPROCESS = FramePreprocessor(clahe=PREPROCESS_CLAHE, clip_limit=CLAHE_CLIP_LIMIT)
+
+
+def _recognize(
+    frame: np.ndarray,
+    scale: float,
+    sightings: Dict,
+    source: str,
+    seen_at: datetime
+) -> None:
+    """Karedeki yüzleri tanır ve `sightings` sözlüğünde biriktirir."""
+    small = _PREPROCESS.resize(frame, scale) if scale != 1.0 else frame
+    rgb = _PREPROCESS(small)
+
+    locations = face_recognition.face_locations(rgb)
+    if not locations:
+        return
+
+    rows, dist, accepted = _GALLERY.match(
+        face_recognition.face_encodings(rgb, locations),
+        tolerance=FACE_MATCH_TOLERANCE,
+        nprobe=ANN_NPROBE,
+    )
+
+    for row, d, ok in zip(rows, dist, accepted):
+        if not ok:
+            continue
+        name, sid = _GALLERY.row(row)
+        # Her gün ayrı bir yoklamadır: görülmeler (numara, gün) başına toplanır
+        entry = sightings.setdefault(
+            (sid, seen_at.strftime("%Y_%m_%d")),
+            {"name": name, "hits": 0, "best": float("inf"), "sample": source, "first": seen_at}
+        )
+        entry["hits"] += 1
+        entry["best"] = min(entry["best"], float(d))
+        if seen_at < entry["first"]:
+            entry["first"], entry["sample"] = seen_at, source
+
+
+def _process_job(job: Job) -> Tuple[Job, Dict, int]:
+    """
+    Bir video parçasını veya fotoğraf grubunu işler.
+
+    Returns:
+        (iş, görülenler, işlenen_kare_sayısı) — görülenler:
+        {(numara, gün): {"name", "hits", "best", "sample", "first"}}
+    """
+    sightings: Dict = {}
+    processed = 0
+
+    if job[0] == "video":
+        _, path, start, end, step, started_at = job
+        cap = cv2.VideoCapture(path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        frame = None  # Kareler aynı tampona okunur
+
+        for frame_no in range(start, end):
+            # Örneklenmeyen kareler sadece grab() ile geçilir (renk dönüşümü yok)
+            if (frame_no - start) % step:
+                if not cap.grab():
+                    break
+                continue
+            ret, frame = cap.read(image=frame)
+            if not ret:
+                break
+            offset = frame_no / fps
+            stamp = time.strftime("%H:%M:%S", time.gmtime(offset))
+            _recognize(frame, SCALE_FACTOR, sightings, f"{os.path.basename(path)} @ {stamp}",
+                       started_at + timedelta(seconds=offset))
+            processed += 1
+        cap.release()
+
+    else:
+        for path, taken_at in job[1]:
+            frame = cv2.imread(path)
+            if frame is None:
+                continue
+            scale = min(1.0, PHOTO_MAX_WIDTH / frame.shape[1])
+            _recognize(frame, scale, sightings, os.path.basename(path), taken_at)
+            processed += 1
+
+    return job, sightings, processed
+
+
+# ============================================================================
+# İŞ PLANLAMA
+# ============================================================================
+def source_start_time(
+    path: str,
+    duration: float = 0.0,
+    date: Optional[str] = None,
+    clock: Optional[str] = None
+) -> datetime:
+    """
+    Kaydın başladığı an: dosyanın mtime'ı eksi süresi (video dosyası kayıt
+    bitince kapanır; fotoğrafta süre 0).
+
+    Args:
+        path: Video / fotoğraf dosyası
+        duration: Kayıt süresi (saniye)
+        date: "YYYY_MM_DD" verilirse gün bununla değiştirilir
+        clock: "HH:MM" veya "HH:MM:SS" verilirse başlangıç saati bununla
+            değiştirilir
+    """
+    started = datetime.fromtimestamp(os.path.getmtime(path)) - timedelta(seconds=duration)
+    if date:
+        day = datetime.strptime(date, "%Y_%m_%d")
+        started = started.replace(year=day.year, month=day.month, day=day.day)
+    if clock:
+        fmt = "%H:%M:%S" if clock.count(":") == 2 else "%H:%M"
+        moment = datetime.strptime(clock, fmt)
+        started = started.replace(hour=moment.hour, minute=moment.minute,
+                                  second=moment.second, microsecond=0)
+    return started
+
+
+def plan_jobs(
+    paths: List[str],
+    sample_fps: float,
+    segment_seconds: float,
+    date: Optional[str] = None,
+    clock: Optional[str] = None
+) -> List[Job]:
+    """
+    Girdi yollarını paralel işlenecek işlere böler.
+
+    Args:
+        paths: Video dosyaları, fotoğraf dosyaları veya klasörler
+        sample_fps: Videodan saniyede örneklenecek kare sayısı
+        segment_seconds: Video parçası uzunluğu (saniye)
+        date: Kayıt günü "YYYY_MM_DD" (varsayılan: dosya zamanından)
+        clock: Kayıt başlangıç saati "HH:MM[:SS]" (varsayılan: dosya zamanından)
+    """
+    videos, images = [], []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for filename in sorted(files):
+                    full = os.path.join(root, filename)
+                    ext = os.path.splitext(filename)[1].lower()
+                    if ext in VIDEO_EXTENSIONS:
+                        videos.append(full)
+                    elif ext in VALID_IMAGE_EXTENSIONS:
+                        images.append(full)
+        elif os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS:
+            videos.append(path)
+        elif os.path.splitext(path)[1].lower() in VALID_IMAGE_EXTENSIONS:
+            images.append(path)
+        else:
+            print_warning(f"Desteklenmeyen girdi atlandı: {path}")
+
+    jobs: List[Job] = []
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            print_error(f"Video açılamadı: {path}")
+            continue
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        step = max(1, int(round(fps / sample_fps)))
+        started_at = source_start_time(path, total / fps, date, clock)
+        # Parça sınırları örnekleme adımına hizalanır; kare kaçmaz/tekrarlanmaz
+        segment = max(step, int(segment_seconds * fps) // step * step)
+        for start in range(0, total, segment):
+            jobs.append(("video", path, start, min(total, start + segment), step, started_at))
+        print_info(f"{os.path.basename(path)}: {total / fps / 60:.1f} dk, "
+                   f"{(total + segment - 1) // segment} parça, her {step} karede 1, "
+                   f"başlangıç {started_at:%d.%m.%Y %H:%M:%S}")
+
+    stamped = [(path, source_start_time(path, 0.0, date, clock)) for path in images]
+    for i in range(0, len(stamped), IMAGE_CHUNK):
+        jobs.append(("images", stamped[i:i + IMAGE_CHUNK]))
+    if images:
+        print_info(f"{len(images)} fotoğraf, {(len(images) + IMAGE_CHUNK - 1) // IMAGE_CHUNK} grup")
+
+    return jobs
+
+
+def run_batch(
+    paths: List[str],
+    sample_fps: float = DEFAULT_SAMPLE_FPS,
+    segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+    workers: int = 0,
+    min_hits: int = DEFAULT_MIN_HITS,
+    dry_run: bool = False,
+    date: Optional[str] = None,
+    clock: Optional[str] = None
+) -> Dict:
+    """
+    Toplu yoklamayı çalıştırır.
+
+    Args:
+        paths: Video / fotoğraf / klasör yolları
+        sample_fps: Video örnekleme hızı
+        segment_seconds: Video parça uzunluğu
+        workers: Süreç sayısı (0 = CPU çekirdek sayısı)
+        min_hits: Bir günün yoklamasına yazılmak için o gün gereken minimum tanınma
+        dry_run: True ise yoklamaya yazılmaz, sadece rapor verilir
+        date: Kayıt günü "YYYY_MM_DD" (varsayılan: dosya zamanından)
+        clock: Kayıt başlangıç saati "HH:MM[:SS]" (varsayılan: dosya zamanından)
+
+    Returns:
+        Dict: {(numara, gün): {"name", "hits", "best", "sample", "first"}}
+    """
+    print_header("TOPLU YOKLAMA")
+    ensure_directories_exist()
+
+    jobs = plan_jobs(paths, sample_fps, segment_seconds, date, clock)
+    if not jobs:
+        print_error("İşlenecek video veya fotoğraf bulunamadı!")
+        return {}
+
+    workers = workers or os.cpu_count() or 1
+    print_info(f"{len(jobs)} iş, {workers} süreç ile işleniyor...")
+
+    sightings: Dict = {}
+    frames = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as executor:
+        futures = [executor.submit(_process_job, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                _, found, processed = future.result()
+            except Exception as e:
+                print_error(f"İş başarısız: {str(e)}")
+                continue
+
+            frames += processed
+            for key, entry in found.items():
+                total = sightings.setdefault(key, dict(entry, hits=0))
+                total["hits"] += entry["hits"]
+                total["best"] = min(total["best"], entry["best"])
+                if entry["first"] < total["first"]:
+                    total["first"], total["sample"] = entry["first"], entry["sample"]
+
+            elapsed = time.perf_counter() - start
+            print(f"\r  [{done}/{len(jobs)}] {frames} kare, {frames / elapsed:.1f} kare/sn", end="")
+    print()
+
+    present = {key: e for key, e in sightings.items() if e["hits"] >= min_hits}
+    students = {sid for sid, _ in present}
+    print_success(f"{frames} kare işlendi, {len(students)} öğrenci "
+                  f"({len(present)} öğrenci-gün) tespit edildi "
+                  f"({time.perf_counter() - start:.1f} sn)")
+
+    for (sid, day), entry in sorted(present.items(), key=lambda item: (item[0][1], item[1]["name"])):
+        print(f"  • {entry['name']} ({sid}) — {entry['hits']} kez, "
+              f"en iyi mesafe {entry['best']:.3f}, "
+              f"ilk görülme {entry['first']:%d.%m.%Y %H:%M:%S} ({entry['sample']})")
+        if not dry_run:
+            # Kayıt, öğrencinin o gün ilk görüldüğü saatle o günün yoklamasına yazılır
+            mark_attendance(entry["name"], sid, STATUS_PRESENT, entry["first"])
+
+    if not dry_run:
+        for day in sorted({day for _, day in present}):
+            print_info(f"Excel dosyası güncellendi: {materialize_attendance_excel(day)}")
+
+    ignored = len(sightings) - len(present)
+    if ignored:
+        print_warning(f"{ignored} öğrenci-gün {min_hits} kereden az görüldüğü için yazılmadı.")
+
+    return present
+
+
+def _option(args: List[str], name: str, default, cast):
+    if name in args:
+        i = args.index(name)
+        value = cast(args[i + 1])
+        del args[i:i + 2]
+        return value
+    return default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    if not args or args[0] in ("--help", "-h"):
+        print("Kullanım:")
+        print("  python batch_attendance.py <video|fotoğraf|klasör> [...]")
+        print(f"      --fps N         Videodan saniyede örneklenecek kare (varsayılan {DEFAULT_SAMPLE_FPS})")
+        print(f"      --segment SN    Paralel video parça uzunluğu (varsayılan {DEFAULT_SEGMENT_SECONDS})")
+        print("      --workers N     Süreç sayısı (varsayılan: çekirdek sayısı)")
+        print(f"      --min-hits N    Yoklama için minimum tanınma (varsayılan {DEFAULT_MIN_HITS})")
+        print("      --dry-run       Yoklamaya yazmadan raporla")
+        print("      --date GÜN      Kayıt günü YYYY_MM_DD (varsayılan: dosya zamanı)")
+        print("      --time SAAT     Kayıt başlangıç saati HH:MM[:SS] (varsayılan: dosya zamanı)")
+        sys.exit(0)
+
+    dry_run = "--dry-run" in args
+    if dry_run:
+        args.remove("--dry-run")
+
+    sample_fps = _option(args, "--fps", DEFAULT_SAMPLE_FPS, float)
+    segment = _option(args, "--segment", DEFAULT_SEGMENT_SECONDS, float)
+    workers = _option(args, "--workers", 0, int)
+    min_hits = _option(args, "--min-hits", DEFAULT_MIN_HITS, int)
+    date = _option(args, "--date", None, str)
+    clock = _option(args, "--time", None, str)
+    try:
+        if date:
+            datetime.strptime(date, "%Y_%m_%d")
+        if clock:
+            datetime.strptime(clock, "%H:%M:%S" if clock.count(":") == 2 else "%H:%M")
+    except ValueError:
+        print_error("--date YYYY_MM_DD, --time HH:MM veya HH:MM:SS biçiminde olmalı.")
+        sys.exit(1)
+
+    run_batch(args, sample_fps, segment, workers, min_hits, dry_run, date, clock)
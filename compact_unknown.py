@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+COMPACT_UNKNOWN.PY - UNKNOWN/ KLASÖRÜNÜ KÜMELEME VE SIKIŞTIRMA ARACI
+==============================================================================
+unknown/ klasöründe biriken `unknown_YYYYMMDD_HHMMSS*.jpg` fotoğraflarını
+kişilere göre gruplar ve her kişi için birkaç temsilci fotoğraf bırakır.
+
+Adımlar:
+1. Encoding: fotoğraflar süreç havuzunda paralel kodlanır (her süreç dlib
+   modellerini bir kez yükler). Sonuçlar dosya içeriğinin SHA-1 özetine göre
+   unknown/_encoding_cache.npz içinde saklanır; tekrar çalıştırınca sadece
+   yeni fotoğraflar kodlanır
+2. Kümeleme: mesafeler satır parçaları halinde tek matris çarpımıyla
+   hesaplanır; sadece eşik altındaki çiftler (seyrek kenar listesi) tutulur,
+   (N x N) matris hiç kurulmaz. Bağlı bileşenler (küme) kenar listesi
+   üzerinde vektörize birleştir-bul ile bulunur
+3. Öğrenci kontrolü: küme merkezleri galeriyle gevşek bir eşikte
+   karşılaştırılır; eşleşenler "kayıtlı öğrenci olabilir" diye işaretlenir
+   (kayıt fotoğrafı güncellenmeli)
+4. Sıkıştırma (--apply): her kümeden merkeze en yakın + birbirinden en
+   farklı `--keep` fotoğraf kalır, gerisi silinir. Son görülmesi
+   `--max-age-days` günden eski kümeler tamamen silinir. `--grace-hours`
+   içinde yazılmış dosyalara (canlı kayıt sürüyor olabilir) dokunulmaz
+5. unknown/manifest.json yazılır; küme merkezleri canlı moddaki
+   kaydedicinin (unknown_sink.py) küme dosyasına atomik olarak aktarılır.
+   Kaydedici çalışıyorsa (main.py açık) --apply hiçbir şeye dokunmadan
+   reddedilir; kaydedici kapanışta küme dosyasını kendi durumuyla ezerdi
+
+Kullanım:
+    python compact_unknown.py                    # Sadece rapor (dry-run)
+    python compact_unknown.py --apply            # Sıkıştır ve manifest yaz
+    python compact_unknown.py --apply --keep 2 --max-age-days 30
+==============================================================================
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gallery import FaceGallery
+from unknown_sink import CLUSTERS_FILE_NAME, UNKNOWN_DIR, sink_lock
+from utils import (
+    VALID_IMAGE_EXTENSIONS,
+    face_distance_matrix,
+    print_error,
+    print_header,
+    print_info,
+    print_success,
+    print_warning,
+)
+
+# ============================================================================
+# AYARLAR
+# ============================================================================
+CACHE_FILE_NAME = "_encoding_cache.npz"
+MANIFEST_FILE_NAME = "manifest.json"
+
+DEFAULT_CLUSTER_DISTANCE = 0.45   # Aynı kişi sayılma eşiği (tek bağlantılı)
+DEFAULT_STUDENT_DISTANCE = 0.6    # Öğrenci işaretleme eşiği (tanımadan gevşek)
+DEFAULT_KEEP = 3                  # Küme başına bırakılacak fotoğraf
+DEFAULT_MAX_AGE_DAYS = 90         # Bu süredir görülmeyen kümeler silinir
+DEFAULT_GRACE_HOURS = 1.0         # Yeni dosyalara dokunulmaz
+
+ENCODE_CHUNK = 32                 # Süreç başına gönderilen fotoğraf sayısı
+DISTANCE_CHUNK = 2048             # Mesafe hesabının satır parça boyutu
+
+_TIMESTAMP = re.compile(r"(\d{8}_\d{6})")
+
+
+# ============================================================================
+# ENCODING (PARALEL + ÖNBELLEK)
+# ============================================================================
+def list_unknown_images(directory: str = UNKNOWN_DIR) -> List[str]:
+    """Klasördeki fotoğraflar (alt çizgiyle başlayan yardımcı dosyalar hariç)."""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(VALID_IMAGE_EXTENSIONS) and not name.startswith("_")
+    ]
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def image_time(path: str) -> datetime:
+    """Dosya adındaki zaman damgası; yoksa değiştirilme zamanı."""
+    match = _TIMESTAMP.search(os.path.basename(path))
+    if match:
+        try:
+            return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def _encode_chunk(paths: List[str]) -> List[Tuple[str, Optional[np.ndarray]]]:
+    """
+    İşçi süreçte fotoğrafları kodlar. Dosyalar zaten yüz kırpıntısı olduğu
+    için (bkz. unknown_sink) tüm görüntü yüz kutusu kabul edilir.
+    """
+    import face_recognition
+
+    results = []
+    for path in paths:
+        try:
+            image = face_recognition.load_image_file(path)
+            height, width = image.shape[:2]
+            encodings = face_recognition.face_encodings(image, [(0, width, height, 0)])
+            results.append((path, np.asarray(encodings[0], dtype=np.float32)))
+        except Exception:
+            results.append((path, None))
+    return results
+
+
+def load_cache(path: str) -> Dict[str, Optional[np.ndarray]]:
+    """{sha1: encoding veya None (kodlanamadı)}"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path) as data:
+            return {
+                h: (enc if ok else None)
+                for h, enc, ok in zip(data["hashes"].tolist(), data["encodings"], data["valid"])
+            }
+    except Exception as e:
+        print_warning(f"Encoding önbelleği okunamadı, yeniden oluşturulacak: {str(e)}")
+        return {}
+
+
+def save_cache(path: str, cache: Dict[str, Optional[np.ndarray]]) -> None:
+    hashes = sorted(cache)
+    encodings = np.zeros((len(hashes), 128), dtype=np.float32)
+    valid = np.zeros(len(hashes), dtype=bool)
+    for i, h in enumerate(hashes):
+        if cache[h] is not None:
+            encodings[i] = cache[h]
+            valid[i] = True
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, hashes=np.asarray(hashes), encodings=encodings, valid=valid)
+    os.replace(tmp, path)
+
+
+def encode_images(
+    paths: List[str],
+    cache_path: str,
+    workers: int = 0
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Fotoğrafları kodlar; önbellekte olanlar tekrar kodlanmaz.
+
+    Returns:
+        (encodings (N x 128), geçerli_maske (N,), sha1_listesi)
+    """
+    cache = load_cache(cache_path)
+    hashes = [file_hash(p) for p in paths]
+
+    missing = sorted({p for p, h in zip(paths, hashes) if h not in cache})
+    print_info(f"{len(paths)} fotoğraf, {len(paths) - len(missing)} önbellekte, "
+               f"{len(missing)} kodlanacak")
+
+    if missing:
+        workers = workers or os.cpu_count() or 1
+        chunks = [missing[i:i + ENCODE_CHUNK] for i in range(0, len(missing), ENCODE_CHUNK)]
+        start = time.perf_counter()
+        done = 0
+        path_hash = dict(zip(paths, hashes))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for results in executor.map(_encode_chunk, chunks):
+                for path, encoding in results:
+                    cache[path_hash[path]] = encoding
+                done += len(results)
+                elapsed = time.perf_counter() - start
+                print(f"\r  [{done}/{len(missing)}] {done / elapsed:.1f} foto/sn", end="")
+        print()
+        save_cache(cache_path, cache)
+
+    encodings = np.zeros((len(paths), 128), dtype=np.float32)
+    valid = np.zeros(len(paths), dtype=bool)
+    for i, h in enumerate(hashes):
+        if cache.get(h) is not None:
+            encodings[i] = cache[h]
+            valid[i] = True
+    return encodings, valid, hashes
+
+
+# ============================================================================
+# KÜMELEME
+# ============================================================================
+def cluster_encodings(encodings: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Mesafesi `threshold` altında olan fotoğrafları aynı kümeye koyar (bağlı
+    bileşenler / tek bağlantılı kümeleme).
+
+    Mesafeler satır parçaları halinde face_distance_matrix ile hesaplanır ve
+    her parçadan sadece eşik altındaki (i < j) çiftler np.nonzero ile
+    alınır; bellek N^2 değil kenar sayısıyla büyür. Bileşenler kenar listesi
+    üzerinde vektörize birleştir-bul ile bulunur: her turda kenar uçlarının
+    kökleri küçük olana bağlanır, ardından işaretçi atlamayla ağaçlar
+    düzleştirilir. Python döngüsü fotoğraf başına değil tur başınadır.
+
+    Returns:
+        np.ndarray: (N,) 0'dan başlayan küme numaraları
+    """
+    n = len(encodings)
+    if n == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    sq_norms = np.einsum("ij,ij->i", encodings, encodings)
+    sources, targets = [], []
+    for s in range(0, n, DISTANCE_CHUNK):
+        distances = face_distance_matrix(encodings, encodings[s:s + DISTANCE_CHUNK], sq_norms)
+        rows, cols = np.nonzero(distances <= threshold)
+        rows += s
+        upper = rows < cols  # Her çift bir kez; köşegen gereksiz
+        sources.append(rows[upper].astype(np.int32))
+        targets.append(cols[upper].astype(np.int32))
+    src = np.concatenate(sources)
+    dst = np.concatenate(targets)
+
+    parent = np.arange(n, dtype=np.int32)
+    while True:
+        root_src, root_dst = parent[src], parent[dst]
+        differ = root_src != root_dst
+        if not differ.any():
+            break
+        root_src, root_dst = root_src[differ], root_dst[differ]
+        low = np.minimum(root_src, root_dst)
+        # Birleştir: büyük kök küçük köke bağlanır (aynı köke birden çok aday varsa en küçüğü)
+        np.minimum.at(parent, np.maximum(root_src, root_dst), low)
+        # Bul: işaretçi atlama, her düğüm doğrudan köküne işaret edene kadar
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    return np.unique(parent, return_inverse=True)[1]
+
+
+def pick_representatives(encodings: np.ndarray, keep: int) -> List[int]:
+    """
+    Küme içinden merkeze en yakın fotoğrafı, ardından seçilenlere en uzak
+    olanları (en uzak nokta örneklemesi) seçer: hem tipik hem farklı açılar.
+    """
+    if len(encodings) <= keep:
+        return list(range(len(encodings)))
+
+    centroid = encodings.mean(axis=0, keepdims=True)
+    chosen = [int(np.argmin(face_distance_matrix(encodings, centroid)[0]))]
+    nearest = face_distance_matrix(encodings, encodings[chosen])[0]
+    while len(chosen) < keep:
+        nxt = int(np.argmax(nearest))
+        chosen.append(nxt)
+        nearest = np.minimum(nearest, face_distance_matrix(encodings, encodings[nxt:nxt + 1])[0])
+    return chosen
+
+
+# ============================================================================
+# ANA İŞLEM
+# ============================================================================
+def compact_unknown(
+    directory: str = UNKNOWN_DIR,
+    apply: bool = False,
+    workers: int = 0,
+    cluster_distance: float = DEFAULT_CLUSTER_DISTANCE,
+    student_distance: float = DEFAULT_STUDENT_DISTANCE,
+    keep: int = DEFAULT_KEEP,
+    max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+    grace_hours: float = DEFAULT_GRACE_HOURS
+) -> Dict:
+    """
+    unknown/ klasörünü kümeler, raporlar ve (apply=True ise) sıkıştırır.
+
+    Returns:
+        Dict: manifest içeriği
+    """
+    print_header("BİLİNMEYEN YÜZ KÜMELEME")
+
+    paths = list_unknown_images(directory)
+    if not paths:
+        print_warning(f"Fotoğraf bulunamadı: {directory}")
+        return {}
+
+    encodings, valid, _ = encode_images(paths, os.path.join(directory, CACHE_FILE_NAME), workers)
+    unreadable = [p for p, ok in zip(paths, valid) if not ok]
+    if unreadable:
+        print_warning(f"{len(unreadable)} fotoğraf kodlanamadı (dokunulmayacak).")
+
+    paths = [p for p, ok in zip(paths, valid) if ok]
+    encodings = encodings[valid]
+    labels = cluster_encodings(encodings, cluster_distance)
+    n_clusters = int(labels.max()) + 1 if len(labels) else 0
+    print_info(f"{len(paths)} fotoğraf {n_clusters} kişiye ayrıldı (eşik {cluster_distance})")
+
+    # Küme merkezlerini galeriyle gevşek eşikte karşılaştır
+    centroids = np.zeros((n_clusters, 128), dtype=np.float32)
+    for c in range(n_clusters):
+        centroids[c] = encodings[labels == c].mean(axis=0)
+    gallery = FaceGallery.load()
+    if gallery is not None and len(gallery) > 0 and n_clusters:
+        rows, dist, flagged = gallery.match(centroids, tolerance=student_distance)
+    else:
+        rows = np.full(n_clusters, -1)
+        dist = np.full(n_clusters, np.inf)
+        flagged = np.zeros(n_clusters, dtype=bool)
+
+    now = datetime.now()
+    times = [image_time(p) for p in paths]
+    to_delete: List[str] = []
+    clusters = []
+
+    for c in range(n_clusters):
+        members = np.flatnonzero(labels == c)
+        reps = [int(members[i]) for i in pick_representatives(encodings[members], keep)]
+        last_seen = max(times[i] for i in members)
+        expired = (now - last_seen).days >= max_age_days
+
+        for i in members:
+            if (now - times[i]).total_seconds() < grace_hours * 3600:
+                continue  # Canlı kaydedici hâlâ yazıyor olabilir
+            if expired or i not in reps:
+                to_delete.append(paths[i])
+
+        student = None
+        if flagged[c]:
+            name, sid = gallery.row(rows[c])
+            student = {"id": sid, "name": name, "distance": round(float(dist[c]), 4)}
+
+        clusters.append({
+            "id": c,
+            "size": int(len(members)),
+            "first_seen": min(times[i] for i in members).isoformat(),
+            "last_seen": last_seen.isoformat(),
+            "expired": bool(expired),
+            "representatives": [] if expired else [os.path.basename(paths[i]) for i in reps],
+            "student": student,
+        })
+
+    # Rapor: büyük kümeler önce
+    print(f"\n  {'küme':>5} {'foto':>6} {'son görülme':>20}  not")
+    print("  " + "-" * 60)
+    for entry in sorted(clusters, key=lambda e: -e["size"])[:20]:
+        note = "süresi doldu" if entry["expired"] else ""
+        if entry["student"]:
+            s = entry["student"]
+            note = f"öğrenci olabilir: {s['name']} ({s['id']}) d={s['distance']:.2f}"
+        print(f"  {entry['id']:>5} {entry['size']:>6} {entry['last_seen'][:19]:>20}  {note}")
+    if len(clusters) > 20:
+        print(f"  ... ve {len(clusters) - 20} küme daha")
+
+    n_flagged = sum(1 for e in clusters if e["student"])
+    if n_flagged:
+        print_warning(f"{n_flagged} küme kayıtlı bir öğrenciye benziyor; kayıt fotoğraflarını kontrol edin.")
+
+    manifest = {
+        "generated": now.isoformat(timespec="seconds"),
+        "cluster_distance": cluster_distance,
+        "student_distance": student_distance,
+        "clusters": clusters,
+        "unreadable": [os.path.basename(p) for p in unreadable],
+    }
+
+    if not apply:
+        print_info(f"Dry-run: {len(to_delete)} fotoğraf silinecekti. Uygulamak için --apply")
+        return manifest
+
+    with ExitStack() as stack:
+        # Canlı kaydedici kapanışta küme dosyasını ezer: çalışıyorsa dokunma.
+        # Kilit sıkıştırma boyunca tutulur; bu sırada açılan kaydedici bekler
+        try:
+            stack.enter_context(sink_lock(directory, blocking=False))
+        except BlockingIOError:
+            print_error("Bilinmeyen yüz kaydedici çalışıyor (main.py açık); hiçbir dosyaya "
+                        "dokunulmadı. Kamerayı kapatıp --apply'ı tekrar çalıştırın.")
+            return manifest
+
+        removed = 0
+        for path in to_delete:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                print_error(f"Silinemedi: {path} ({str(e)})")
+
+        manifest_path = os.path.join(directory, MANIFEST_FILE_NAME)
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, manifest_path)
+
+        # Silinen dosyaların önbellek kayıtları atılır
+        remaining = {file_hash(p) for p in list_unknown_images(directory)}
+        cache_path = os.path.join(directory, CACHE_FILE_NAME)
+        save_cache(cache_path, {h: e for h, e in load_cache(cache_path).items() if h in remaining})
+
+        # Canlı kaydedici bu kişileri tekrar kaydetmesin (geçici dosya + atomik yer değiştirme)
+        live = [e for e in clusters if not e["expired"]]
+        clusters_path = os.path.join(directory, CLUSTERS_FILE_NAME)
+        tmp = clusters_path + ".tmp.npz"
+        np.savez(
+            tmp,
+            centroids=centroids[[e["id"] for e in live]].reshape(-1, 128),
+            members=np.asarray([e["size"] for e in live], dtype=np.int64),
+            saved=np.asarray([len(e["representatives"]) for e in live], dtype=np.int64),
+        )
+        os.replace(tmp, clusters_path)
+
+    print_success(f"{removed} fotoğraf silindi, {len(paths) - removed} kaldı. Manifest: {manifest_path}")
+    return manifest
+
+
+def _option(args: List[str], name: str, default, cast):
+    if name in args:
+        i = args.index(name)
+        value = cast(args[i + 1])
+        del args[i:i + 2]
+        return value
+    return default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    if "--help" in args or "-h" in args:
+        print("Kullanım:")
+        print("  python compact_unknown.py [--apply]")
+        print("      --workers N             Süreç sayısı (varsayılan: çekirdek sayısı)")
+        print(f"      --distance D            Kümeleme eşiği (varsayılan {DEFAULT_CLUSTER_DISTANCE})")
+        print(f"      --student-distance D    Öğrenci işaretleme eşiği (varsayılan {DEFAULT_STUDENT_DISTANCE})")
+        print(f"      --keep N                Küme başına kalan fotoğraf (varsayılan {DEFAULT_KEEP})")
+        print(f"      --max-age-days N        Bu süredir görülmeyen kümeleri sil (varsayılan {DEFAULT_MAX_AGE_DAYS})")
+        print(f"      --grace-hours N         Yeni dosyalara dokunma (varsayılan {DEFAULT_GRACE_HOURS})")
+        print("      --apply                 Silme ve manifest yazma (yoksa sadece rapor)")
+        sys.exit(0)
+
+    apply = "--apply" in args
+    if apply:
+        args.remove("--apply")
+
+    compact_unknown(
+        apply=apply,
+        workers=_option(args, "--workers", 0, int),
+        cluster_distance=_option(args, "--distance", DEFAULT_CLUSTER_DISTANCE, float),
+        student_distance=_option(args, "--student-distance", DEFAULT_STUDENT_DISTANCE, float),
+        keep=_option(args, "--keep", DEFAULT_KEEP, int),
+        max_age_days=_option(args, "--max-age-days", DEFAULT_MAX_AGE_DAYS, float),
+        grace_hours=_option(args, "--grace-hours", DEFAULT_GRACE_HOURS, float),
+    )
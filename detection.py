@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+DETECTION.PY - HAREKET KAPISI VE BÖLGESEL YÜZ ALGILAMA
+==============================================================================
+Sınav gibi büyük ölçüde durağan sahnelerde HOG algılamayı her karede tüm
+görüntüde çalıştırmak gereksizdir. Bu modül:
+
+- MotionGate: küçültülmüş gri (ön işlenmiş) görüntüyü son algılamanın
+  yapıldığı referans kareyle karşılaştırır; değişiklik yoksa algılamayı
+  atlar, varsa sadece hareketli bölgeleri döndürür. Belirli aralıklarla
+  tüm kare yeniden taranır (periyodik yenileme)
+- detect_in_regions: yüz algılamayı sadece verilen bölgelerde çalıştırır
+- detect_faces: tam kare taramaları arasında, önceki turda görülen yüzlerin
+  genişletilmiş kutularını (ROI) daha yüksek çözünürlükte yeniden tarar.
+  Birden çok ROI tek bir mozaik görüntüye dizilir; HOG ve encoding tüm
+  ROI'ler için tek çağrıda (batch) çalışır
+
+Referans kare yalnızca algılama yapıldığında güncellenir; yavaş giren bir
+kişinin oluşturduğu fark, atlanan karelerde birikir ve eşiği aşınca
+algılamayı tetikler.
+==============================================================================
+"""
+
+import threading
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from tracker import iou_matrix
+from utils import FramePreprocessor, preprocess_frame
+
+Box = Tuple[int, int, int, int]  # (top, right, bottom, left) — face_recognition düzeni
+
+
+def _merge_boxes(boxes: List[Box]) -> List[Box]:
+    """Kesişen bölgeleri tek bölgede birleştirir (bölge sayısı küçüktür)."""
+    merged = list(boxes)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i], merged[j]
+                if a[0] <= b[2] and b[0] <= a[2] and a[3] <= b[1] and b[3] <= a[1]:
+                    merged[i] = (min(a[0], b[0]), max(a[1], b[1]),
+                                 max(a[2], b[2]), min(a[3], b[3]))
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
+
+
+class MotionGate:
+    """
+    Kare farkı (frame differencing) tabanlı hareket kapısı.
+
+    Args:
+        pixel_threshold: Bir pikselin "değişti" sayılması için gri fark eşiği
+        min_area: Hareket sayılması için değişen alanın kareye oranı
+        full_frame_area: Hareketli alan bu oranı geçerse tüm kare taranır
+        refresh_every: Tüm karenin en geç kaç karede bir taranacağı
+        padding: Hareket bölgelerine eklenen kenar payı (piksel, küçük kare)
+        min_region: Bölgelerin minimum kenar uzunluğu (HOG penceresi için)
+    """
+
+    def __init__(
+        self,
+        pixel_threshold: int = 25,
+        min_area: float = 0.002,
+        full_frame_area: float = 0.35,
+        refresh_every: int = 60,
+        padding: int = 12,
+        min_region: int = 48
+    ):
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.full_frame_area = full_frame_area
+        self.refresh_every = refresh_every
+        self.padding = padding
+        self.min_region = min_region
+
+        self._reference: Optional[np.ndarray] = None
+        self._last_full = -refresh_every
+        self._lock = threading.Lock()
+        self._kernel = np.ones((5, 5), np.uint8)
+
+        # İstatistik
+        self.skipped = 0
+        self.partial = 0
+        self.full = 0
+
+    def check(
+        self,
+        gray: np.ndarray,
+        frame_no: int
+    ) -> Tuple[bool, Optional[List[Box]]]:
+        """
+        Bu karede algılama yapılmalı mı?
+
+        Args:
+            gray: Küçültülmüş, ön işlenmiş gri kare (utils.preprocess_gray)
+            frame_no: Kare numarası (periyodik yenileme için)
+
+        Returns:
+            (algıla, bölgeler) — bölgeler None ise tüm kare taranmalı;
+            algıla False ise algılama tamamen atlanabilir
+        """
+        with self._lock:
+            reference = self._reference
+
+            full_due = (
+                reference is None
+                or reference.shape != gray.shape
+                or frame_no - self._last_full >= self.refresh_every
+            )
+            if full_due:
+                self._reference = gray.copy()
+                self._last_full = frame_no
+                self.full += 1
+                return True, None
+
+            diff = cv2.absdiff(gray, reference)
+            _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+            changed = cv2.countNonZero(mask) / mask.size
+
+            if changed < self.min_area:
+                self.skipped += 1
+                return False, []
+
+            self._reference = gray.copy()
+
+            if changed >= self.full_frame_area:
+                self._last_full = frame_no
+                self.full += 1
+                return True, None
+
+            mask = cv2.dilate(mask, self._kernel, iterations=2)
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        height, width = gray.shape[:2]
+        regions = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            # Kenar payı + HOG'un yüzü bulabilmesi için minimum boyut
+            grow_x = max(self.padding, (self.min_region - w + 1) // 2)
+            grow_y = max(self.padding, (self.min_region - h + 1) // 2)
+            regions.append((
+                max(0, y - grow_y),
+                min(width, x + w + grow_x),
+                min(height, y + h + grow_y),
+                max(0, x - grow_x),
+            ))
+
+        self.partial += 1
+        return True, _merge_boxes(regions)
+
+
+def detect_in_regions(
+    locate: Callable[[np.ndarray], List[Box]],
+    rgb: np.ndarray,
+    regions: Optional[Sequence[Box]] = None
+) -> List[Box]:
+    """
+    Yüz algılamayı sadece verilen bölgelerde çalıştırır.
+
+    Args:
+        locate: Algılama fonksiyonu (ör. face_recognition.face_locations)
+        rgb: Küçültülmüş RGB kare
+        regions: (top, right, bottom, left) bölgeler; None ise tüm kare
+
+    Returns:
+        List[Box]: `rgb` koordinatlarında yüz kutuları
+    """
+    if regions is None:
+        return list(locate(rgb))
+
+    locations = []
+    for top, right, bottom, left in regions:
+        crop = np.ascontiguousarray(rgb[top:bottom, left:right])
+        for (t, r, b, l) in locate(crop):
+            locations.append((t + top, r + left, b + top, l + left))
+    return locations
+
+
+# ============================================================================
+# ROI YENİDEN ALGILAMA (MOZAİK BATCH)
+# ============================================================================
+def expand_boxes(boxes: Sequence[Box], ratio: float, frame_shape: Tuple[int, ...]) -> List[Box]:
+    """
+    Kutuları her yönde kutu boyutunun `ratio` katı kadar genişletir, kare
+    sınırlarına kırpar ve kesişenleri birleştirir.
+    """
+    height, width = frame_shape[:2]
+    expanded = []
+    for top, right, bottom, left in boxes:
+        grow_y = int((bottom - top) * ratio)
+        grow_x = int((right - left) * ratio)
+        expanded.append((
+            max(0, top - grow_y),
+            min(width, right + grow_x),
+            min(height, bottom + grow_y),
+            max(0, left - grow_x),
+        ))
+    return _merge_boxes(expanded)
+
+
+def build_roi_mosaic(
+    frame: np.ndarray,
+    rois: Sequence[Box],
+    scale: float,
+    gap: int = 8,
+    max_width: int = 960
+) -> Tuple[np.ndarray, List[Tuple[Box, int, int, int, int]]]:
+    """
+    ROI kırpıntılarını `scale` ile yeniden boyutlandırıp raf (shelf)
+    yerleşimiyle tek bir BGR mozaiğe dizer.
+
+    Returns:
+        (mozaik, karolar) — karolar: (roi, mozaik_top, mozaik_left, h, w)
+    """
+    tiles = []
+    x = y = row_height = mosaic_width = 0
+    for roi in rois:
+        top, right, bottom, left = roi
+        h = max(1, int(round((bottom - top) * scale)))
+        w = max(1, int(round((right - left) * scale)))
+        if x > 0 and x + w > max_width:
+            x, y, row_height = 0, y + row_height + gap, 0
+        tiles.append((roi, y, x, h, w))
+        x += w + gap
+        row_height = max(row_height, h)
+        mosaic_width = max(mosaic_width, x - gap)
+
+    mosaic = np.zeros((y + row_height, mosaic_width, 3), dtype=frame.dtype)
+    for (top, right, bottom, left), my, mx, h, w in tiles:
+        mosaic[my:my + h, mx:mx + w] = cv2.resize(
+            frame[top:bottom, left:right], (w, h), interpolation=cv2.INTER_AREA
+        )
+    return mosaic, tiles
+
+
+def _mosaic_to_frame(
+    location: Box,
+    tiles: Sequence[Tuple[Box, int, int, int, int]],
+    scale: float
+) -> Optional[Box]:
+    """Mozaik koordinatındaki kutuyu, merkezinin düştüğü karo üzerinden tam kareye taşır."""
+    t, r, b, l = location
+    cy, cx = (t + b) / 2, (l + r) / 2
+    for (top, _, _, left), my, mx, h, w in tiles:
+        if my <= cy < my + h and mx <= cx < mx + w:
+            t, b = max(t, my), min(b, my + h)
+            l, r = max(l, mx), min(r, mx + w)
+            return (
+                top + int((t - my) / scale),
+                left + int((r - mx) / scale),
+                top + int((b - my) / scale),
+                left + int((l - mx) / scale),
+            )
+    return None
+
+
+def detect_faces(
+    locate: Callable[[np.ndarray], List[Box]],
+    rgb_small: np.ndarray,
+    scale: float,
+    regions: Optional[Sequence[Box]] = None,
+    frame: Optional[np.ndarray] = None,
+    rois: Sequence[Box] = (),
+    roi_scale: float = 0.5,
+    dedupe_iou: float = 0.3,
+    preprocessor: Optional[FramePreprocessor] = None
+) -> Tuple[List[Tuple[Box, int, Box]], List[np.ndarray]]:
+    """
+    Küçük karede (tam veya `regions` içinde) ve tam kare ROI'lerinde
+    (mozaik, `roi_scale` çözünürlüğünde) yüz algılar.
+
+    Args:
+        locate: Algılama fonksiyonu (ör. face_recognition.face_locations)
+        rgb_small: `scale` ile küçültülmüş, ön işlenmiş RGB kare
+        regions: Küçük karede taranacak bölgeler; None ise tüm kare, boş
+            liste ise küçük kare hiç taranmaz
+        frame: Tam çözünürlüklü BGR kare (ROI'ler için)
+        rois: Tam kare koordinatlarında yeniden taranacak bölgeler
+        roi_scale: ROI'lerin tarandığı ölçek (SCALE_FACTOR'dan büyük)
+        dedupe_iou: ROI ve küçük kare algılamaları çakışırsa tekilleştirme eşiği
+        preprocessor: Mozaik ön işlemesi için tampon kullanan FramePreprocessor
+            ("roi" tamponu; küçük karenin tamponuna dokunmaz)
+
+    Returns:
+        (yüzler, görüntüler) — yüzler: (tam_kare_kutusu, görüntü_no, konum);
+        encoding her yüz için `görüntüler[görüntü_no]` içindeki `konum`dan
+        hesaplanır (bkz. encode_detected)
+    """
+    images = [rgb_small]
+    faces: List[Tuple[Box, int, Box]] = []
+
+    # Önce yüksek çözünürlüklü ROI algılamaları (çakışmada bunlar tercih edilir)
+    if rois:
+        mosaic, tiles = build_roi_mosaic(frame, rois, roi_scale)
+        if preprocessor is None:
+            rgb_mosaic = preprocess_frame(mosaic)
+        else:
+            rgb_mosaic = preprocessor(mosaic, slot="roi")
+        images.append(rgb_mosaic)
+        for location in locate(rgb_mosaic):
+            box = _mosaic_to_frame(location, tiles, roi_scale)
+            if box is not None:
+                faces.append((box, 1, tuple(location)))
+
+    for (t, r, b, l) in detect_in_regions(locate, rgb_small, regions):
+        box = (int(t / scale), int(r / scale), int(b / scale), int(l / scale))
+        faces.append((box, 0, (t, r, b, l)))
+
+    # Açgözlü tekilleştirme: öndeki (ROI) algılama kalır
+    if len(faces) > 1 and rois:
+        ious = iou_matrix([f[0] for f in faces], [f[0] for f in faces])
+        keep = []
+        for i in range(len(faces)):
+            if all(ious[i, j] < dedupe_iou for j in keep):
+                keep.append(i)
+        faces = [faces[i] for i in keep]
+
+    return faces, images
+
+
+def encode_detected(
+    encode: Callable[[np.ndarray, List[Box]], List[np.ndarray]],
+    images: Sequence[np.ndarray],
+    faces: Sequence[Tuple[Box, int, Box]],
+    indices: Sequence[int]
+) -> List[np.ndarray]:
+    """
+    `faces[indices]` için encoding'leri hesaplar; aynı görüntüdeki yüzler
+    tek çağrıda (batch) işlenir. Sonuç `indices` sırasındadır.
+    """
+    encodings: List[Optional[np.ndarray]] = [None] * len(indices)
+    for image_no, image in enumerate(images):
+        positions = [k for k, i in enumerate(indices) if faces[i][1] == image_no]
+        if not positions:
+            continue
+        locations = [faces[indices[k]][2] for k in positions]
+        for k, encoding in zip(positions, encode(image, locations)):
+            encodings[k] = encoding
+    return encodings
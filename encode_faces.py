@@ -12,9 +12,22 @@ oluşturur ve pickle dosyasına kaydeder.
 3. 128-D yüz encoding vektörü oluştur
 4. Tüm encoding'leri pickle dosyasına kaydet
 
+2. ve 3. adımlar süreç havuzunda paralel yapılır (ENCODE_WORKERS):
+resimler işçilere eşit bölünen (en fazla ENCODE_CHUNK'lık) parçalar
+halinde dağıtılır, her işçi dlib modellerini bir kez yükler. Sonuçlar
+dataset sırasıyla toplanır; galeri sıralı çalıştırmayla birebir aynıdır.
+
+Bir resimde birden fazla yüz varsa sadece ilk bulunan yüz kodlanır (diğer
+yüzlerin encoding'i hesaplanmaz); bu resimler uyarıyla ve sonda liste
+halinde raporlanır, öğrencinin tek başına olduğu bir fotoğrafla
+değiştirilmeleri önerilir.
+
 Dosya Adı Formatı:
 - Dataset'teki dosyalar: NUMARA_ADSOYAD.jpg
 - Örnek: 123_Ali_Yilmaz.jpg, 124_Ayse_Kaya.png
+- Aynı öğrenci için ek fotoğraflar: 123_Ali_Yilmaz_2.jpg
+  veya bir öğrenci klasörü: 123_Ali_Yilmaz/foto1.jpg, foto2.jpg, ...
+- Her fotoğraf öğrencinin şablon (template) kümesine eklenir
 
 Yazar: Senior Python Computer Vision Engineer
 Tarih: 2025
@@ -27,6 +40,10 @@ Python Sürümü: 3.10+
 # ============================================================================
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
 import cv2
 import numpy as np
 
@@ -41,10 +58,12 @@ except ImportError:
     sys.exit(1)
 
 # Proje yardımcı fonksiyonlarını import et
+from ann_index import build_and_save_index
+from gallery import FaceGallery
 from utils import (
     DATASET_DIR,
+    VALID_IMAGE_EXTENSIONS,
     get_dataset_images,
-    save_encodings,
     ensure_directories_exist,
     print_header,
     print_info,
@@ -54,21 +73,94 @@ from utils import (
 )
 
 
+# ============================================================================
+# AYARLAR
+# ============================================================================
+ENCODE_WORKERS = 0   # 0: çekirdek sayısı, 1: sıralı (tek süreç)
+ENCODE_CHUNK = 8     # Süreç başına bir seferde gönderilen en fazla resim (küçük dataset'te daha az)
+
+# Bir resmin sonucu: (durum, encoding, yüz_sayısı, hata_mesajı)
+# durum: "ok", "no_face", "no_encoding", "missing", "error"
+EncodeResult = Tuple[str, Optional[np.ndarray], int, Optional[str]]
+
+
+# ============================================================================
+# İŞÇİ SÜREÇ
+# ============================================================================
+def _worker_init() -> None:
+    """
+    İşçi süreç başlangıcı. face_recognition dlib modellerini (HOG dedektörü,
+    landmark ve ResNet encoder) import sırasında yükler; burada bir kez
+    yüklenir ve sürecin tüm parçalarında yeniden kullanılır.
+    """
+    import face_recognition  # noqa: F401
+
+
+def _encode_image(file_path: str) -> EncodeResult:
+    """
+    Tek bir resimden ilk bulunan yüzün 128-D encoding'ini çıkarır. Birden
+    fazla yüz varsa diğerleri kodlanmaz; yüz sayısı sonuçla döner.
+    """
+    try:
+        # ================================================================
+        # ADIM 1: RESMİ YÜKLE
+        # ================================================================
+        # face_recognition.load_image_file() RGB formatında yükler
+        image = face_recognition.load_image_file(file_path)
+
+        # ================================================================
+        # ADIM 2: YÜZ LOKASYONLARINI BUL
+        # ================================================================
+        # face_locations() fonksiyonu resimdeki tüm yüzleri bulur
+        # model="hog" CPU için hızlı, model="cnn" GPU için daha doğru
+        face_locations = face_recognition.face_locations(image, model="hog")
+
+        if not face_locations:
+            return "no_face", None, 0, None
+
+        # ================================================================
+        # ADIM 3: 128-D ENCODING VEKTÖRÜ OLUŞTUR
+        # ================================================================
+        # face_encodings() fonksiyonu her yüz için 128 boyutlu
+        # benzersiz bir vektör oluşturur; ilk yüzünki kullanılır
+        encodings = face_recognition.face_encodings(image, face_locations[:1])
+
+        if not encodings:
+            return "no_encoding", None, len(face_locations), None
+
+        return "ok", encodings[0], len(face_locations), None
+
+    except FileNotFoundError:
+        return "missing", None, 0, None
+
+    except Exception as e:
+        return "error", None, 0, str(e)
+
+
+def _encode_chunk(paths: List[str]) -> List[EncodeResult]:
+    return [_encode_image(path) for path in paths]
+
+
 # ============================================================================
 # ANA ENCODING FONKSİYONU
 # ============================================================================
-def encode_faces_from_dataset() -> tuple:
+def encode_faces_from_dataset(force_ann_index: bool = False, workers: int = ENCODE_WORKERS) -> tuple:
     """
     Dataset klasöründeki tüm resimlerden yüz encoding'leri oluşturur.
     
     İşlem Akışı:
     1. Dataset klasörünü tara
-    2. Her resim için:
+    2. Her resim için (süreç havuzunda, işçilere eşit bölünmüş parçalar):
        a. Resmi yükle
        b. Yüz lokasyonunu bul
        c. 128-D encoding vektörü hesapla
-       d. Listeye ekle
-    3. Tüm encoding'leri pickle'a kaydet
+    3. Sonuçları dataset sırasıyla listeye ekle, hataları raporla
+    4. Tüm encoding'leri pickle'a kaydet
+    5. Galeri büyükse ANN indeksini oluştur (face_index.npz)
+    
+    Args:
+        force_ann_index: Galeri küçük olsa bile ANN indeksi oluştur
+        workers: İşçi süreç sayısı (0: çekirdek sayısı, 1: sıralı)
     
     Returns:
         tuple: (encodings_list, names_list, ids_list)
@@ -99,73 +191,73 @@ def encode_faces_from_dataset() -> tuple:
     # İşlem sayaçları
     success_count = 0
     fail_count = 0
+    multi_face = []  # Birden fazla yüz bulunan (ilki kullanılan) resimler
     
-    print(f"\n[INFO] {len(images)} resim işlenecek...\n")
+    paths = [file_path for file_path, _, _ in images]
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    # Parçalar işçi sayısına göre boyutlanır: küçük dataset'te de tüm işçiler
+    # iş alır; ENCODE_CHUNK sadece üst sınırdır (yük dengeleme)
+    chunk_size = max(1, min(ENCODE_CHUNK, -(-len(paths) // workers)))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    workers = min(workers, len(chunks))  # Boşta bekleyecek süreç başlatılmaz
+
+    print(f"\n[INFO] {len(images)} resim işlenecek ({workers} süreç)...\n")
     print("-" * 60)
-    
-    # Her resmi işle
-    for idx, (file_path, student_id, student_name) in enumerate(images, 1):
-        try:
-            print(f"\n[{idx}/{len(images)}] İşleniyor: {student_name} ({student_id})")
-            
-            # ================================================================
-            # ADIM 1: RESMİ YÜKLE
-            # ================================================================
-            # face_recognition.load_image_file() RGB formatında yükler
-            image = face_recognition.load_image_file(file_path)
-            print(f"  [✓] Resim yüklendi: {os.path.basename(file_path)}")
-            
-            # ================================================================
-            # ADIM 2: YÜZ LOKASYONLARINI BUL
-            # ================================================================
-            # face_locations() fonksiyonu resimdeki tüm yüzleri bulur
-            # model="hog" CPU için hızlı, model="cnn" GPU için daha doğru
-            face_locations = face_recognition.face_locations(image, model="hog")
-            
-            if not face_locations:
+
+    start = time.perf_counter()
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init)
+        # map() parçaları gönderim sırasıyla döndürür: sonuç sırası deterministik
+        chunk_results = executor.map(_encode_chunk, chunks)
+    else:
+        executor = None
+        chunk_results = map(_encode_chunk, chunks)
+
+    try:
+        results = (result for chunk in chunk_results for result in chunk)
+        for idx, ((file_path, student_id, student_name), result) in enumerate(zip(images, results), 1):
+            status, face_encoding, n_faces, error = result
+            print(f"[{idx}/{len(images)}] {student_name} ({student_id}) - {os.path.basename(file_path)}")
+
+            if status == "no_face":
                 print(f"  [✗] UYARI: Bu resimde yüz bulunamadı!")
                 print(f"  [!] Dosya atlanıyor: {file_path}")
                 fail_count += 1
                 continue
-            
-            if len(face_locations) > 1:
-                print(f"  [!] UYARI: {len(face_locations)} yüz bulundu, ilki kullanılacak.")
-            
-            print(f"  [✓] Yüz lokasyonu bulundu")
-            
-            # ================================================================
-            # ADIM 3: 128-D ENCODING VEKTÖRÜ OLUŞTUR
-            # ================================================================
-            # face_encodings() fonksiyonu her yüz için 128 boyutlu 
-            # benzersiz bir vektör oluşturur
-            encodings = face_recognition.face_encodings(image, face_locations)
-            
-            if not encodings:
+
+            if status == "no_encoding":
                 print(f"  [✗] UYARI: Encoding oluşturulamadı!")
                 fail_count += 1
                 continue
-            
-            # İlk yüzün encoding'ini al
-            face_encoding = encodings[0]
-            print(f"  [✓] 128-D encoding vektörü oluşturuldu")
-            
+
+            if status == "missing":
+                print_error(f"Dosya bulunamadı: {file_path}")
+                fail_count += 1
+                continue
+
+            if status == "error":
+                print_error(f"İşlem hatası: {error}")
+                fail_count += 1
+                continue
+
+            if n_faces > 1:
+                print(f"  [!] UYARI: {n_faces} yüz bulundu, sadece ilki kodlandı; diğerleri yok sayıldı.")
+                multi_face.append(file_path)
+
             # ================================================================
             # ADIM 4: LİSTELERE EKLE
             # ================================================================
             all_encodings.append(face_encoding)
             all_names.append(student_name)
             all_ids.append(student_id)
-            
             success_count += 1
             print(f"  [✓] Başarıyla kaydedildi!")
-            
-        except FileNotFoundError:
-            print_error(f"Dosya bulunamadı: {file_path}")
-            fail_count += 1
-            
-        except Exception as e:
-            print_error(f"İşlem hatası: {str(e)}")
-            fail_count += 1
+
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
     
     # ================================================================
     # ÖZET VE KAYIT
@@ -176,12 +268,21 @@ def encode_faces_from_dataset() -> tuple:
     print(f"\n  Toplam resim sayısı:    {len(images)}")
     print(f"  Başarılı encoding:      {success_count}")
     print(f"  Başarısız/Atlanan:      {fail_count}")
+    print(f"  Süre:                   {elapsed:.1f} sn ({len(images) / max(elapsed, 1e-9):.1f} resim/sn, {workers} süreç)")
+
+    if multi_face:
+        print_warning(f"{len(multi_face)} resimde birden fazla yüz var; sadece ilk bulunan yüz kaydedildi.")
+        print_warning("Yanlış kişinin yüzü kaydedilmiş olabilir, tek kişilik fotoğrafla değiştirin:")
+        for file_path in multi_face:
+            print(f"    • {file_path}")
     
     if all_encodings:
-        # Encoding'leri pickle dosyasına kaydet
-        save_success = save_encodings(all_encodings, all_names, all_ids)
+        # Encoding'leri float32 galeri olarak pickle dosyasına kaydet
+        gallery = FaceGallery(all_encodings, all_names, all_ids)
+        save_success = gallery.save()
         
         if save_success:
+            build_and_save_index(gallery.centroids, force=force_ann_index)
             print_success(f"\n{success_count} öğrenci encoding'i başarıyla kaydedildi!")
             print_info("Artık main.py ile yüz tanıma yapabilirsiniz.")
         else:
@@ -214,7 +315,14 @@ def validate_dataset() -> bool:
     
     # İçerik kontrolü
     files = os.listdir(DATASET_DIR)
-    image_files = [f for f in files if f.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp'))]
+    image_files = [f for f in files if f.lower().endswith(VALID_IMAGE_EXTENSIONS)]
+    
+    # Öğrenci klasörleri (NUMARA_ADSOYAD/) — klasör adı formatı kontrol edilir
+    student_dirs = [f for f in files if os.path.isdir(os.path.join(DATASET_DIR, f))]
+    for dirname in student_dirs:
+        dir_path = os.path.join(DATASET_DIR, dirname)
+        if any(f.lower().endswith(VALID_IMAGE_EXTENSIONS) for f in os.listdir(dir_path)):
+            image_files.append(dirname)
     
     if not image_files:
         print_error("Dataset klasöründe resim dosyası bulunamadı!")
@@ -301,6 +409,8 @@ if __name__ == "__main__":
             print("  python encode_faces.py           # Encoding oluştur")
             print("  python encode_faces.py --info    # Dataset bilgisi")
             print("  python encode_faces.py --validate # Dataset doğrula")
+            print("  python encode_faces.py --ann     # ANN indeksini her durumda oluştur")
+            print("  python encode_faces.py --workers N # İşçi süreç sayısı (1: sıralı)")
             print("  python encode_faces.py --help    # Bu yardım")
             sys.exit(0)
     
@@ -317,7 +427,13 @@ if __name__ == "__main__":
         response = input().strip().lower()
         if response in ['', 'e', 'evet', 'y', 'yes']:
             # Encoding işlemini başlat
-            encodings, names, ids = encode_faces_from_dataset()
+            workers = ENCODE_WORKERS
+            if '--workers' in sys.argv:
+                workers = int(sys.argv[sys.argv.index('--workers') + 1])
+            encodings, names, ids = encode_faces_from_dataset(
+                force_ann_index='--ann' in sys.argv,
+                workers=workers
+            )
             
             if encodings:
                 print("\n" + "=" * 60)
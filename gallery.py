@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+GALLERY.PY - YÜZ GALERİSİ MODÜLÜ
+==============================================================================
+Kayıtlı öğrenci encoding'lerini tek bir bellek bloğunda tutan FaceGallery
+sınıfını içerir.
+
+- Her öğrenci bir veya daha fazla şablon (template) encoding'e sahiptir
+- Şablonlar öğrenciye göre sıralı, C-bitişik float32 (T x 128) matriste
+  tutulur; öğrenci başına şablon aralığı `template_offsets` ile bulunur
+- Her öğrenci için şablonların ortalaması (centroid) hızlı ilk aşama
+  eşleşmesinde kullanılır; şablonların tamamı yalnızca en iyi adayları
+  yeniden sıralamak için taranır
+- ||k||² normları yükleme sırasında bir kez hesaplanır
+- Numara/isim dizileri ve sözlük indeksleri ile satır, numara ve isim
+  üzerinden arama yapılır
+
+main.py, analysis.py ve encode_faces.py aynı sınıfı kullanır; kare başına
+mesafe hesabında dizi yeniden oluşturulmaz.
+
+Büyük galerilerde encodings/face_index.npz varsa (bkz. ann_index.py)
+ilk aşama tam arama yerine centroid'ler üzerindeki IVF indeksini kullanır.
+==============================================================================
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ann_index import IVFIndex
+from utils import (
+    ANN_INDEX_FILE,
+    ENCODINGS_FILE,
+    load_encodings,
+    save_encodings,
+    face_distance_matrix,
+    match_faces,
+    print_info,
+    print_warning,
+)
+
+ENCODING_DIM = 128
+
+# Centroid ön elemesinden sonra şablonlarla yeniden sıralanacak aday sayısı
+RERANK_TOP_K = 5
+
+
+class FaceGallery:
+    """
+    Kayıtlı öğrencilerin şablon/centroid matrisleri ve kimlik bilgileri.
+
+    Satır (row) her zaman bir öğrenciyi ifade eder.
+
+    Attributes:
+        templates: (T x 128) öğrenciye göre sıralı float32 şablonlar
+        template_owner: (T,) her şablonun ait olduğu öğrenci satırı
+        template_offsets: (N + 1) öğrenci şablonlarının başlangıç indeksleri
+        centroids: (N x 128) öğrenci başına şablon ortalaması
+        names: (N,) öğrenci isimleri (numpy unicode dizisi)
+        ids: (N,) öğrenci numaraları (numpy unicode dizisi)
+    """
+
+    def __init__(
+        self,
+        encodings: Sequence[np.ndarray],
+        names: Sequence[str],
+        ids: Sequence[str]
+    ):
+        matrix = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        names = np.asarray(names, dtype=str)
+        ids = np.asarray([str(sid) for sid in ids], dtype=str)
+
+        if not (len(matrix) == len(names) == len(ids)):
+            raise ValueError("encodings, names ve ids uzunlukları eşit olmalı")
+
+        # Şablonları öğrenci numarasına göre grupla (kayıt sırası korunur)
+        _, first_seen, inverse = np.unique(ids, return_index=True, return_inverse=True)
+        rank = np.empty(len(first_seen), dtype=np.intp)
+        rank[np.argsort(first_seen, kind="stable")] = np.arange(len(first_seen))
+        owner = rank[inverse.reshape(-1)]
+        order = np.argsort(owner, kind="stable")
+        student_first = np.sort(first_seen)
+
+        self.templates = np.ascontiguousarray(matrix[order])
+        self.template_sq_norms = np.einsum("ij,ij->i", self.templates, self.templates)
+        self.template_owner = owner[order]
+
+        counts = np.bincount(self.template_owner, minlength=len(student_first))
+        self.template_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+        self.template_counts = counts
+
+        self.names = names[student_first]
+        self.ids = ids[student_first]
+
+        if len(self.templates):
+            sums = np.add.reduceat(self.templates, self.template_offsets[:-1], axis=0)
+            self.centroids = np.ascontiguousarray(sums / counts[:, None], dtype=np.float32)
+        else:
+            self.centroids = np.empty((0, ENCODING_DIM), dtype=np.float32)
+        self.centroid_sq_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+
+        self.index: Optional[IVFIndex] = None
+
+        self._id_index: Dict[str, int] = {
+            sid: row for row, sid in enumerate(self.ids.tolist())
+        }
+        self._name_index: Dict[str, List[int]] = {}
+        for row, name in enumerate(self.names.tolist()):
+            self._name_index.setdefault(name, []).append(row)
+
+    # --------------------------------------------------------
+    @classmethod
+    def empty(cls) -> "FaceGallery":
+        """Boş galeri döndürür."""
+        return cls(np.empty((0, ENCODING_DIM), dtype=np.float32), [], [])
+
+    @classmethod
+    def from_data(cls, data: Dict[str, List]) -> "FaceGallery":
+        """load_encodings() sözlüğünden galeri oluşturur."""
+        return cls(data["encodings"], data["names"], data["ids"])
+
+    @classmethod
+    def load(
+        cls,
+        path: str = ENCODINGS_FILE,
+        use_index: bool = True
+    ) -> Optional["FaceGallery"]:
+        """
+        Pickle dosyasından galeri yükler.
+
+        Args:
+            path: Pickle dosyasının yolu
+            use_index: Pickle ile aynı klasördeki ANN indeksini
+                (face_index.npz) varsa galeriye bağla
+
+        Returns:
+            FaceGallery veya None (dosya yoksa / okunamazsa)
+        """
+        data = load_encodings(path)
+        if data is None:
+            return None
+
+        gallery = cls.from_data(data)
+        if use_index:
+            # İndeks her zaman yüklenen galerinin yanındaki dosyadır
+            index = IVFIndex.load(os.path.join(os.path.dirname(path), os.path.basename(ANN_INDEX_FILE)))
+            if index is not None:
+                gallery.attach_index(index)
+        return gallery
+
+    def attach_index(self, index: IVFIndex) -> bool:
+        """
+        Centroid'ler üzerine kurulmuş ANN indeksini galeriye bağlar. İndeks
+        başka (eski) bir galeriden oluşturulmuşsa bağlanmaz ve tam arama
+        kullanılmaya devam edilir.
+        """
+        if not index.matches_gallery(self.centroids):
+            print_warning("ANN indeksi güncel galeriyle uyuşmuyor, tam arama kullanılacak.")
+            print_warning("İndeksi yenilemek için encode_faces.py çalıştırın.")
+            return False
+
+        self.index = index
+        print_info(f"ANN indeksi yüklendi ({index.nlist} küme, nprobe={index.nprobe}).")
+        return True
+
+    def save(self) -> bool:
+        """
+        Galeriyi ENCODINGS_FILE dosyasına kaydeder. Şablonlar, her biri için
+        isim ve numara tekrarlanarak paralel listeler halinde yazılır.
+        """
+        return save_encodings(
+            self.templates,
+            self.names[self.template_owner].tolist(),
+            self.ids[self.template_owner].tolist(),
+        )
+
+    # --------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n_templates(self) -> int:
+        return len(self.templates)
+
+    @property
+    def template_names(self) -> np.ndarray:
+        """(T,) her şablonun sahibinin ismi."""
+        return self.names[self.template_owner]
+
+    def row(self, index: int) -> Tuple[str, str]:
+        """Öğrenci satırına göre (isim, numara) döndürür."""
+        return str(self.names[index]), str(self.ids[index])
+
+    def by_id(self, student_id: str) -> Optional[int]:
+        """Öğrenci numarasına göre satır indeksini döndürür."""
+        return self._id_index.get(str(student_id))
+
+    def by_name(self, name: str) -> List[int]:
+        """İsme göre eşleşen tüm satır indekslerini döndürür."""
+        return list(self._name_index.get(name, []))
+
+    # --------------------------------------------------------
+    def distances(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Sorgu encoding'lerinin her öğrenciye mesafesi (öğrencinin en yakın
+        şablonu).
+
+        Args:
+            queries: (F x 128) encoding'ler
+
+        Returns:
+            np.ndarray: (F x N) float32 mesafe matrisi
+        """
+        template_dist = self.template_distances(queries)
+        if len(self) == 0:
+            return template_dist
+        return np.minimum.reduceat(template_dist, self.template_offsets[:-1], axis=1)
+
+    def template_distances(self, queries: np.ndarray) -> np.ndarray:
+        """Sorguların tüm şablonlara mesafesi: (F x T)."""
+        return face_distance_matrix(self.templates, queries, self.template_sq_norms)
+
+    def _rerank(
+        self,
+        queries: np.ndarray,
+        candidates: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aday öğrencileri tüm şablonlarıyla yeniden sıralar.
+
+        Her (sorgu, aday) çifti için o adayın şablon aralığı düz bir indeks
+        dizisine açılır; mesafeler tek seferde hesaplanıp çift başına
+        minimum alınır. Öğrenci başına Python döngüsü yoktur.
+
+        Args:
+            queries: (F x 128) float32 encoding'ler
+            candidates: (F x K) aday öğrenci satırları (-1 = boş)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (en_iyi_satır, en_iyi_mesafe)
+        """
+        n_queries, k = candidates.shape
+        valid = candidates >= 0
+        safe = np.where(valid, candidates, 0)
+
+        starts = self.template_offsets[safe].ravel()
+        lengths = self.template_counts[safe].ravel()
+        pair_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        total = int(lengths.sum())
+
+        template_idx = (np.arange(total) - np.repeat(pair_starts, lengths)
+                        + np.repeat(starts, lengths))
+        query_idx = np.repeat(np.repeat(np.arange(n_queries), k), lengths)
+
+        q = queries[query_idx]
+        t = self.templates[template_idx]
+        sq = (np.einsum("ij,ij->i", q, q) + self.template_sq_norms[template_idx]
+              - 2.0 * np.einsum("ij,ij->i", q, t))
+        np.maximum(sq, 0.0, out=sq)
+
+        pair_dist = np.minimum.reduceat(np.sqrt(sq), pair_starts).reshape(n_queries, k)
+        pair_dist[~valid] = np.inf
+
+        best = np.argmin(pair_dist, axis=1)
+        rows = np.arange(n_queries)
+        best_rows = np.where(valid[rows, best], candidates[rows, best], -1)
+        return best_rows, pair_dist[rows, best]
+
+    def match(
+        self,
+        queries: np.ndarray,
+        tolerance: float,
+        nprobe: Optional[int] = None,
+        top_k: int = RERANK_TOP_K
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sorguları galeriyle eşleştirir.
+
+        1. İlk aşama: centroid'lere mesafe (ANN indeksi bağlıysa yaklaşık)
+           ile her sorgu için en iyi `top_k` aday seçilir
+        2. Yeniden sıralama: adayların tüm şablonlarına mesafe hesaplanır,
+           öğrencinin en yakın şablonu belirleyici olur
+
+        Her öğrencinin tek şablonu varsa (centroid = şablon) ve ANN indeksi
+        yoksa doğrudan tek geçişli tam arama (utils.match_faces) yapılır.
+
+        Args:
+            queries: (F x 128) encoding'ler
+            tolerance: Eşleşme toleransı
+            nprobe: ANN indeksinde taranacak küme sayısı (None = indeks varsayılanı)
+            top_k: Yeniden sıralanacak aday sayısı
+
+        Returns:
+            Tuple: (en_iyi_satır, en_iyi_mesafe, kabul) — bkz. utils.match_faces
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        n_queries = len(queries)
+        if n_queries == 0 or len(self) == 0:
+            return (
+                np.full(n_queries, -1, dtype=np.intp),
+                np.full(n_queries, np.inf, dtype=np.float32),
+                np.zeros(n_queries, dtype=bool),
+            )
+
+        single_template = self.n_templates == len(self)
+        if single_template and self.index is None:
+            return match_faces(self.centroids, queries, tolerance, self.centroid_sq_norms)
+
+        top_k = max(1, min(top_k, len(self)))
+        if self.index is not None:
+            candidates, cand_dist = self.index.search(queries, nprobe, k=top_k)
+        else:
+            coarse = face_distance_matrix(self.centroids, queries, self.centroid_sq_norms)
+            candidates = np.argpartition(coarse, top_k - 1, axis=1)[:, :top_k]
+            cand_dist = np.take_along_axis(coarse, candidates, axis=1)
+
+        if single_template:
+            # Centroid = şablon; yeniden sıralamaya gerek yok
+            best = np.argmin(cand_dist, axis=1)
+            rows = np.arange(n_queries)
+            best_rows = candidates[rows, best]
+            best_dist = cand_dist[rows, best]
+        else:
+            best_rows, best_dist = self._rerank(queries, candidates)
+
+        accepted = (best_rows >= 0) & (best_dist <= tolerance)
+        return best_rows, best_dist, accepted
@@ -5,9 +5,14 @@ import shutil
 import os
 import sys
 
+from utils import read_attendance_snapshot
+
 # Sanal ortamdaki Python yorumlayıcısı
 PYTHON_EXE = sys.executable
 
+# main.py'nin atomik olarak yenilediği günlük yoklama özetinin okunma aralığı
+SUMMARY_REFRESH_MS = 2000
+
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
@@ -97,7 +102,10 @@ class MainMenu(ctk.CTk):
         self.main_panel = ctk.CTkFrame(self)
         self.main_panel.pack(side="right", fill="both", expand=True)
 
+        self.camera_process = None
+        self.summary_label = None
         self.show_home_page()
+        self.refresh_summary()
 
     # =====================================================
     # ANA SAYFA
@@ -121,6 +129,35 @@ class MainMenu(ctk.CTk):
         )
         desc.pack(pady=10)
 
+        self.summary_label = ctk.CTkLabel(
+            self.main_panel,
+            text="",
+            font=("Arial", 16),
+            justify="left",
+        )
+        self.summary_label.pack(pady=30)
+        self.refresh_summary(schedule=False)
+
+    # =====================================================
+    # BUGÜNÜN YOKLAMA ÖZETİ (dosyadan, süreç başlatmadan)
+    # =====================================================
+    def refresh_summary(self, schedule=True):
+        if self.summary_label is not None and self.summary_label.winfo_exists():
+            # utils.BASE_DIR'e göre okunur; GUI hangi klasörden açılırsa açılsın
+            snapshot = read_attendance_snapshot()
+            if snapshot:
+                names = ", ".join(snapshot["students"][-8:])
+                text = (f"Bugün gelen: {snapshot['present']} öğrenci "
+                        f"(son güncelleme {snapshot['updated']})")
+                if names:
+                    text += f"\nSon gelenler: {names}"
+            else:
+                text = "Bugün henüz yoklama alınmadı."
+            self.summary_label.configure(text=text)
+
+        if schedule:
+            self.after(SUMMARY_REFRESH_MS, self.refresh_summary)
+
     # =====================================================
     # ÖĞRENCİ EKLEME SAYFASI
     # =====================================================
@@ -190,8 +227,15 @@ class MainMenu(ctk.CTk):
             messagebox.showerror("Hata", "Lütfen tüm alanları doldurun!")
             return
 
-        filename = f"{student_id}_{name.replace(' ', '_')}.jpg"
-        dest_path = os.path.join("dataset", filename)
+        base = f"{student_id}_{name.replace(' ', '_')}"
+        dest_path = os.path.join("dataset", f"{base}.jpg")
+
+        # Öğrencinin fotoğrafı zaten varsa ek şablon olarak kaydet (_2, _3, ...)
+        suffix = 2
+        while os.path.exists(dest_path):
+            dest_path = os.path.join("dataset", f"{base}_{suffix}.jpg")
+            suffix += 1
+
         shutil.copy(self.photo_path, dest_path)
 
         messagebox.showinfo("Başarılı", "Öğrenci kaydedildi! Encoding güncelleniyor...")
@@ -222,7 +266,11 @@ class MainMenu(ctk.CTk):
     # KAMERA BAŞLAT
     # =====================================================
     def start_camera(self):
-        subprocess.call([PYTHON_EXE, "main.py"])
+        # Arayüz donmasın (özet canlı güncellensin); ikinci kez başlatılmaz
+        if self.camera_process is not None and self.camera_process.poll() is None:
+            messagebox.showinfo("Bilgi", "Kamera zaten çalışıyor.")
+            return
+        self.camera_process = subprocess.Popen([PYTHON_EXE, "main.py"])
 
     # =====================================================
     # ENCODING GÜNCELLE
@@ -5,12 +5,12 @@ MAIN.PY - YÜZ TANIMA YOKLAMA SİSTEMİ ANA MODÜLÜ
 ==============================================================================
 """
 
-import os
 import sys
+import threading
+import time
 import cv2
 import numpy as np
 from typing import List, Tuple
-from datetime import datetime
 
 try:
     import face_recognition
@@ -18,9 +18,27 @@ except ImportError:
     print("[HATA] face_recognition bulunamadı! pip install face_recognition")
     sys.exit(1)
 
+from detection import MotionGate, detect_faces, encode_detected, expand_boxes
+from gallery import FaceGallery
+from tracker import FaceTracker, UNKNOWN_NAME, iou_matrix
+from unknown_sink import UnknownFaceSink
+from pipeline import (
+    AdaptiveFrameController,
+    MultiCameraPipeline,
+    ProcessRecognitionPool,
+    RecognitionPipeline,
+)
 from utils import (
-    load_encodings,
+    ANN_NPROBE,
+    CLAHE_CLIP_LIMIT,
+    FACE_MATCH_TOLERANCE,
+    PREPROCESS_CLAHE,
+    SCALE_FACTOR,
+    FramePreprocessor,
+    AttendanceWriter,
+    ExcelMaterializer,
     mark_attendance,
+    get_attendance_state,
     get_attendance_summary,
     ensure_directories_exist,
     print_header,
@@ -32,17 +50,68 @@ from utils import (
 
 # Kamera ayarları
 CAMERA_INDEX = 0
+# Birden çok kamera tek süreçte: indeks veya akış adresi listesi
+# (ör. [0, 1, "rtsp://..."]). Model, galeri ve yoklama yazıcısı ortaktır.
+CAMERA_SOURCES = [CAMERA_INDEX]
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 
-# Performans
+# Performans (başlangıç değerleri; adaptif kontrolcü çalışırken değiştirir).
+# SCALE_FACTOR, FACE_MATCH_TOLERANCE, ANN_NPROBE ve ön işleme ayarları
+# batch_attendance.py ile ortaktır ve utils.py'de tanımlıdır.
 PROCESS_EVERY_N_FRAMES = 4
-SCALE_FACTOR = 0.25
 
-# Eşleşme hassasiyeti
-FACE_MATCH_TOLERANCE = 0.50
+# Adaptif kare atlama — ölçülen gecikme ve kamera FPS'ine göre
+# PROCESS_EVERY_N_FRAMES ve (isteğe bağlı) SCALE_FACTOR çalışma anında ayarlanır
+ADAPTIVE_FRAME_SKIP = True
+ADAPTIVE_SCALE = True
+LATENCY_BUDGET_MS = 250     # Tek tanıma için hedef süre
+CPU_BUDGET = 0.75           # Tanıma işçilerinin hedef meşguliyet oranı
+SHOW_PERF_OVERLAY = True    # Güncel değerleri ve son ayar nedenini ekranda göster
+
+# Tanıma iş parçacığı sayısı (0 = eski tek thread'li döngü)
+RECOGNITION_WORKERS = 2
+
+# Tanıma süreç sayısı (0 = kapalı, iş parçacıkları kullanılır). >0 ise HOG +
+# encoding ayrı süreçlerde çalışır, kareler paylaşımlı bellekle aktarılır.
+RECOGNITION_PROCESSES = 0
+
+# Yüz takibi — encoding sadece yeni / düşük güvenli / doğrulama zamanı
+# gelmiş takipler için hesaplanır (kare sayısı cinsinden)
+TRACK_IOU_THRESHOLD = 0.3
+TRACK_CONFIDENT_DISTANCE = 0.42
+TRACK_REVERIFY_FRAMES = 90
+TRACK_UNKNOWN_RETRY_FRAMES = 12
+
+# Hareket kapısı — durağan sahnede HOG atlanır, sadece hareketli bölgeler
+# taranır; tüm kare en geç MOTION_REFRESH_FRAMES karede bir yeniden taranır
+MOTION_GATE = True
+MOTION_PIXEL_THRESHOLD = 25
+MOTION_MIN_AREA = 0.002
+MOTION_REFRESH_FRAMES = 60
+
+# ROI yeniden algılama — tam kare taramaları arasında önceki yüzlerin
+# genişletilmiş kutuları ROI_SCALE çözünürlüğünde (tek mozaikte) taranır
+ROI_REDETECT = True
+ROI_SCALE = 0.5
+ROI_EXPAND = 0.6            # Kutunun her yöne genişletilme oranı
+ROI_FULL_REFRESH_FRAMES = 24  # Hareket kapısı kapalıyken tam kare tarama aralığı
+
+# Yoklama günlüğe (CSV, fsync) yazılır; Excel dosyası arka planda bu aralıkla
+# ve oturum sonunda günlükten üretilir (saniye)
+EXCEL_EXPORT_INTERVAL = 60
+# Tanıma döngüsü diske hiç beklemez: kayıtlar bu pencere boyunca biriktirilip
+# tek yazımla (tek fsync) günlüğe eklenir (saniye)
+ATTENDANCE_FLUSH_WINDOW = 0.25
+
+# Bilinmeyen yüzler — arka planda encoding mesafesiyle kümelenir; her yabancı
+# için en fazla UNKNOWN_MAX_PER_PERSON fotoğraf kaydedilir
+UNKNOWN_CLUSTER_DISTANCE = 0.5
+UNKNOWN_MAX_PER_PERSON = 3
+UNKNOWN_MIN_INTERVAL = 10.0  # Aynı kişinin iki fotoğrafı arası (sn)
 
 # Renkler
+COLOR_YELLOW = (0, 255, 255)
 COLOR_GREEN = (0, 255, 0)
 COLOR_RED = (0, 0, 255)
 COLOR_WHITE = (255, 255, 255)
@@ -51,15 +120,80 @@ FONT = cv2.FONT_HERSHEY_SIMPLEX
 
 
 # ============================================================
-# 📌 GÖRÜNTÜ ÖN İŞLEME
+# KAMERA BAŞINA DURUM
 # ============================================================
-def preprocess_frame(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    gray = cv2.equalizeHist(gray)
-    gray = cv2.GaussianBlur(gray, (3, 3), 0)
-    gray_bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-    rgb = cv2.cvtColor(gray_bgr, cv2.COLOR_BGR2RGB)
-    return rgb
+class CameraStream:
+    """
+    Tek bir kameranın durumu: kaynak, takipçi, hareket kapısı, adaptif
+    kontrolcü ve son tanıma sonucu. Galeri ve yoklama tüm kameralarda ortaktır.
+    """
+
+    def __init__(self, index, source, workers, cameras=1):
+        self.index = index
+        self.source = source
+        self.name = f"Kamera {index}" if isinstance(source, int) else str(source)
+        self.camera = None
+        self.frame_count = 0
+
+        self.tracker = FaceTracker(
+            iou_threshold=TRACK_IOU_THRESHOLD,
+            confident_distance=TRACK_CONFIDENT_DISTANCE,
+            reverify_every=TRACK_REVERIFY_FRAMES,
+            unknown_retry_every=TRACK_UNKNOWN_RETRY_FRAMES,
+        )
+
+        self.motion_gate = MotionGate(
+            pixel_threshold=MOTION_PIXEL_THRESHOLD,
+            min_area=MOTION_MIN_AREA,
+            refresh_every=MOTION_REFRESH_FRAMES,
+        ) if MOTION_GATE else None
+
+        self.controller = AdaptiveFrameController(
+            skip=PROCESS_EVERY_N_FRAMES,
+            scale=SCALE_FACTOR,
+            workers=workers,
+            cameras=cameras,
+            latency_budget=LATENCY_BUDGET_MS / 1000,
+            cpu_budget=CPU_BUDGET,
+            adapt_scale=ADAPTIVE_SCALE,
+            enabled=ADAPTIVE_FRAME_SKIP,
+        )
+
+        # Tamponlar iş parçacığı başına; aynı kameranın işçileri paylaşabilir
+        self.preprocessor = FramePreprocessor(
+            clahe=PREPROCESS_CLAHE, clip_limit=CLAHE_CLIP_LIMIT
+        )
+
+        # Tek thread'li döngünün okuma tamponu ve ekran tamponu (kareler arası
+        # yeniden kullanılır; ring tamponlarına çizim yapılmaz)
+        self.frame_buffer = None
+        self.display_buffer = None
+
+        self.last_tracked_frame = -1
+        self.last_full_detection = -ROI_FULL_REFRESH_FRAMES
+
+        # Ekranda gösterilen son tanıma sonucu
+        self.face_locations = []
+        self.recognized = []
+        self.result_seq = -1
+        self.shown_seq = -1
+
+    def open(self):
+        self.camera = cv2.VideoCapture(self.source)
+
+        if not self.camera.isOpened():
+            print_error(f"Kamera açılamadı: {self.name}")
+            return False
+
+        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+        # Sürücü tamponunda bayat kare birikmesin
+        self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return True
+
+    def release(self):
+        if self.camera is not None:
+            self.camera.release()
 
 
 # ============================================================
@@ -67,20 +201,36 @@ def preprocess_frame(frame):
 # ============================================================
 class FaceRecognitionAttendance:
 
-    def __init__(self):
+    def __init__(self, sources=None):
         print_header("YÜZ TANIMA YOKLAMA SİSTEMİ")
         ensure_directories_exist()
 
-        if not os.path.exists("unknown"):
-            os.makedirs("unknown")
-
-        self.known_encodings = []
-        self.known_names = []
-        self.known_ids = []
-        self.marked_today = set()  # 🔥 Bugün kaydedilenler
-        self.unknown_saved = False  # 🔥 Bilinmeyen kişi kaydedildi mi
-        self.camera = None
-        self.frame_count = 0
+        self.gallery = FaceGallery.empty()
+        # 🔥 Günlükle eşzamanlı, (numara, tarih) indeksli yoklama durumu
+        self.attendance = get_attendance_state()
+        self.attendance_writer = AttendanceWriter(self.attendance, ATTENDANCE_FLUSH_WINDOW)
+        self.excel_export = ExcelMaterializer(EXCEL_EXPORT_INTERVAL)
+
+        # 🔥 Bilinmeyen yüzler kuyrukla arka plana; disk yazımı kareyi bekletmez
+        self.unknown_sink = UnknownFaceSink(
+            cluster_distance=UNKNOWN_CLUSTER_DISTANCE,
+            max_per_cluster=UNKNOWN_MAX_PER_PERSON,
+            min_interval=UNKNOWN_MIN_INTERVAL,
+        )
+
+        sources = list(sources) if sources is not None else list(CAMERA_SOURCES)
+        if RECOGNITION_PROCESSES > 0 and len(sources) == 1:
+            workers = RECOGNITION_PROCESSES
+        else:
+            workers = max(1, RECOGNITION_WORKERS)
+        # Ortak işçiler kameralar arasında paylaşılır; kamera başı payı kontrolcü hesaplar
+        self.cams = [
+            CameraStream(i, src, workers, cameras=len(sources))
+            for i, src in enumerate(sources)
+        ]
+
+        # Tanıma iş parçacıkları arasında paylaşılan durum (takipçi, yoklama) kilidi
+        self._state_lock = threading.Lock()
 
         self._load_face_data()
 
@@ -88,109 +238,238 @@ class FaceRecognitionAttendance:
     def _load_face_data(self):
         print_info("Encoding verileri yükleniyor...")
 
-        data = load_encodings()
-        if data is None:
+        gallery = FaceGallery.load()
+        if gallery is None:
             print_error("Encoding dosyası bulunamadı!")
             return False
 
-        self.known_encodings = data["encodings"]
-        self.known_names = data["names"]
-        self.known_ids = data["ids"]
+        self.gallery = gallery
 
-        print_success(f"{len(self.known_encodings)} öğrenci yüklendi.")
-        for name, sid in zip(self.known_names, self.known_ids):
+        print_success(f"{len(self.gallery)} öğrenci yüklendi.")
+        for row in range(len(self.gallery)):
+            name, sid = self.gallery.row(row)
             print(f"  • {name} (No: {sid})")
         return True
 
     # --------------------------------------------------------
     def _init_camera(self):
-        self.camera = cv2.VideoCapture(CAMERA_INDEX)
-
-        if not self.camera.isOpened():
-            print_error("Kamera açılamadı!")
-            return False
-
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
-        return True
+        return all(cam.open() for cam in self.cams)
 
     # --------------------------------------------------------
     # 🔥 YENİ — SADECE 1 KEZ KAYIT!
-    def _mark_student_attendance(self, name, student_id):
+    def _mark_student_attendance(self, name, student_id, cam=None):
 
         # ➤ Eğer öğrenci bugün zaten kaydedildiyse hiçbir şey yapma!
-        if student_id in self.marked_today:
+        # (Önceki çalıştırmaların kayıtları ve gün dönümü de dahil, O(1))
+        if self.attendance.is_marked(student_id):
             return  
 
-        # ➤ İlk defa görülüyorsa Excel’e Giriş yaz
+        # ➤ İlk defa görülüyorsa günlüğe Giriş yaz
         success, msg = mark_attendance(name, student_id, "Geldi")
         if success:
-            self.marked_today.add(student_id)
-            print_success(f"GİRİŞ → {name} ({student_id})")
+            where = f" [{cam.name}]" if cam is not None and len(self.cams) > 1 else ""
+            print_success(f"GİRİŞ → {name} ({student_id}){where}")
 
     # --------------------------------------------------------
-    def _process_frame(self, frame):
-        small = cv2.resize(frame, (0, 0), fx=SCALE_FACTOR, fy=SCALE_FACTOR)
-        rgb_small = preprocess_frame(small)
+    def _process_frame(self, cam, frame, frame_no=None):
+        if frame_no is None:
+            frame_no = cam.frame_count
+        start = time.perf_counter()
+
+        # Kontrolcü ölçeği değiştirebilir; bu kare boyunca sabit kalsın
+        scale = cam.controller.scale
+
+        small = cam.preprocessor.resize(frame, scale)
+        gray_small = cam.preprocessor.gray(small)
+
+        # 🔥 Hareket yoksa algılama/encoding tamamen atlanır
+        detect, regions = self._check_motion(cam, gray_small, frame_no)
+        if not detect:
+            with self._state_lock:
+                if frame_no < cam.last_tracked_frame:
+                    return None
+                cam.last_tracked_frame = frame_no
+                return self._visible_results(cam)
+
+        with self._state_lock:
+            regions, rois, searched = self._plan_detection(cam, regions, scale, frame, frame_no)
+
+        rgb_small = cam.preprocessor.rgb(gray_small)
+        faces, images = detect_faces(
+            face_recognition.face_locations, rgb_small, scale,
+            regions=regions, frame=frame, rois=rois, roi_scale=ROI_SCALE,
+            preprocessor=cam.preprocessor,
+        )
+
+        scaled = [box for box, _, _ in faces]
+        n_detected = len(scaled)
+
+        # 🔥 Kutuları takiplerle eşleştir; encoding sadece gereken yüzler için
+        with self._state_lock:
+            # Başka bir işçi daha yeni bir kareyi zaten işlediyse bu sonuç bayat
+            if frame_no < cam.last_tracked_frame:
+                return None
+            cam.last_tracked_frame = frame_no
+
+            # Taranmayan alanlardaki (durağan) takipler korunur
+            if searched is not None:
+                scaled += self._static_track_boxes(cam, searched)
+
+            tracks = cam.tracker.update(scaled)
+            to_encode = [
+                i for i, track in enumerate(tracks[:n_detected])
+                if cam.tracker.needs_encoding(track, frame_no)
+            ]
+
+        if to_encode:
+            # ROI yüzleri mozaikten, diğerleri küçük kareden (görüntü başına tek çağrı)
+            face_encodings = encode_detected(
+                face_recognition.face_encodings, images, faces, to_encode
+            )
 
-        face_locations = face_recognition.face_locations(rgb_small)
-        face_encodings = face_recognition.face_encodings(rgb_small, face_locations)
+            # 🔥 Tüm yüzler galeriyle tek geçişte eşleştirilir
+            best_idx, best_dist, accepted = self.gallery.match(
+                face_encodings, tolerance=FACE_MATCH_TOLERANCE, nprobe=ANN_NPROBE
+            )
 
-        recognized = []
+            self._apply_matches(
+                cam, frame, scaled, tracks, to_encode, face_encodings,
+                best_idx, best_dist, accepted, frame_no
+            )
 
-        for encoding, loc in zip(face_encodings, face_locations):
+        with self._state_lock:
+            recognized = [(track.name, track.student_id) for track in tracks]
+            # Gecikme sadece algılama yapılan karelerden ölçülür
+            cam.controller.record_latency(time.perf_counter() - start)
 
-            matches = face_recognition.compare_faces(
-                self.known_encodings, encoding, tolerance=FACE_MATCH_TOLERANCE
+        return scaled, recognized
+
+    # --------------------------------------------------------
+    def _check_motion(self, cam, gray_small, frame_no):
+        """Hareket kapısı kapalıysa her zaman tüm kare taranır."""
+        if cam.motion_gate is None:
+            return True, None
+        return cam.motion_gate.check(gray_small, frame_no)
+
+    def _plan_detection(self, cam, regions, scale, frame, frame_no):
+        """
+        Bu turda nerelerin taranacağına karar verir (kilit altında çağrılır).
+
+        - Tam kare: hareket kapısı istediyse / periyodik yenileme zamanıysa /
+          takip edilen yüz yoksa
+        - Aksi halde: önceki yüzlerin ROI'leri (yüksek çözünürlük) + hareket
+          kapısının bölgeleri (küçük kare)
+
+        Returns:
+            (küçük_kare_bölgeleri, roi_listesi, taranan_alanlar) — taranan
+            alanlar None ise tam kare taranır (takip taşınmaz)
+        """
+        tracked = [track.box for track in cam.tracker.visible_tracks()]
+
+        # Hareket kapısı yoksa tam kare taraması ROI_FULL_REFRESH_FRAMES ile zamanlanır
+        if cam.motion_gate is None:
+            full_due = (
+                not ROI_REDETECT
+                or not tracked
+                or frame_no - cam.last_full_detection >= ROI_FULL_REFRESH_FRAMES
             )
+            regions = None if full_due else []
+
+        if regions is None:
+            cam.last_full_detection = frame_no
+            return None, [], None
+
+        searched = [
+            (int(t / scale), int(r / scale), int(b / scale), int(l / scale))
+            for (t, r, b, l) in regions
+        ]
+
+        rois = []
+        if ROI_REDETECT and tracked:
+            # Hareket kapısı açıksa sadece hareketli bölgeye değen yüzler yeniden taranır
+            if searched:
+                hit = iou_matrix(tracked, searched).max(axis=1) > 0
+                tracked = [box for box, h in zip(tracked, hit) if h]
+            elif cam.motion_gate is not None:
+                tracked = []
+            rois = expand_boxes(tracked, ROI_EXPAND, frame.shape)
+
+        return regions, rois, searched + rois
+
+    def _static_track_boxes(self, cam, searched):
+        """Taranan alanların (tam kare koordinatı) dışında kalan görünür takip kutuları."""
+        visible = [track.box for track in cam.tracker.visible_tracks()]
+        if not visible or not searched:
+            return visible
+        overlaps = iou_matrix(visible, searched).max(axis=1) > 0
+        return [box for box, hit in zip(visible, overlaps) if not hit]
+
+    def _visible_results(self, cam):
+        """Algılama atlandığında son bilinen kutular ve isimler."""
+        tracks = cam.tracker.visible_tracks()
+        return (
+            [track.box for track in tracks],
+            [(track.name, track.student_id) for track in tracks],
+        )
 
-            name = "Bilinmeyen"
-            sid = None
-
-            distances = face_recognition.face_distance(self.known_encodings, encoding)
-            if len(distances) > 0:
-                best = np.argmin(distances)
-
-                if matches[best]:
-                    name = self.known_names[best]
-                    sid = self.known_ids[best]
-                    self._mark_student_attendance(name, sid)
-
-                else:
-                    # Bilinmeyeni sadece 1 kez kaydet
-                    if not self.unknown_saved:
-                        top, right, bottom, left = loc
-                        top = int(top / SCALE_FACTOR)
-                        right = int(right / SCALE_FACTOR)
-                        bottom = int(bottom / SCALE_FACTOR)
-                        left = int(left / SCALE_FACTOR)
-
-                        face_img = frame[top:bottom, left:right]
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        cv2.imwrite(f"unknown/unknown_{timestamp}.jpg", face_img)
-
-                        print_warning("Bilinmeyen kişi tespit edildi – fotoğraf kaydedildi.")
-                        self.unknown_saved = True
-
-            recognized.append((name, sid))
-
-        scaled = []
-        for (top, right, bottom, left) in face_locations:
-            scaled.append(
-                (
-                    int(top / SCALE_FACTOR),
-                    int(right / SCALE_FACTOR),
-                    int(bottom / SCALE_FACTOR),
-                    int(left / SCALE_FACTOR),
+    # --------------------------------------------------------
+    def _apply_matches(self, cam, frame, scaled, tracks, indices, encodings,
+                       best_idx, best_dist, accepted, frame_no):
+        """Eşleşme sonuçlarını takiplere ve yoklamaya yazar, bilinmeyenleri kaydediciye verir."""
+        with self._state_lock:
+            for k, i in enumerate(indices):
+                track = tracks[i]
+
+                if accepted[k]:
+                    name, sid = self.gallery.row(best_idx[k])
+                    cam.tracker.assign_identity(
+                        track, name, sid, best_dist[k], frame_no
+                    )
+                    self._mark_student_attendance(name, sid, cam)
+                    continue
+
+                cam.tracker.assign_identity(
+                    track, UNKNOWN_NAME, None, best_dist[k], frame_no
                 )
-            )
+
+                # Kümeleme ve kayıt arka planda; aynı kişi sınırlı sayıda kaydedilir
+                if len(self.gallery) > 0:
+                    top, right, bottom, left = scaled[i]
+                    face_img = frame[max(0, top):bottom, max(0, left):right]
+                    self.unknown_sink.submit(face_img, encodings[k])
+
+    # --------------------------------------------------------
+    def _apply_remote_result(self, cam, frame, result, frame_no, searched=None):
+        """İşçi süreçten gelen sonucu (kutular + eşleşmeler) uygular."""
+        scaled = list(result["boxes"])
+
+        with self._state_lock:
+            if searched is not None:
+                scaled += self._static_track_boxes(cam, searched)
+            tracks = cam.tracker.update(scaled)
+
+        self._apply_matches(
+            cam, frame, scaled, tracks, result["encoded"], result["encodings"],
+            result["rows"], result["distances"], result["accepted"], frame_no
+        )
+
+        with self._state_lock:
+            recognized = [(track.name, track.student_id) for track in tracks]
 
         return scaled, recognized
 
+    def _skip_boxes(self, cam, frame_no):
+        """İşçilerin encoding hesaplamasına gerek olmayan (güvenli) takip kutuları."""
+        with self._state_lock:
+            return [
+                track.box for track in cam.tracker.visible_tracks()
+                if not cam.tracker.needs_encoding(track, frame_no)
+            ]
+
     # --------------------------------------------------------
     def _draw_results(self, frame, face_locations, recognized):
         for (top, right, bottom, left), (name, sid) in zip(face_locations, recognized):
-            color = COLOR_GREEN if name != "Bilinmeyen" else COLOR_RED
+            color = COLOR_GREEN if name != UNKNOWN_NAME else COLOR_RED
 
             cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
 
@@ -201,6 +480,29 @@ class FaceRecognitionAttendance:
 
         return frame
 
+    def _display_copy(self, cam, frame):
+        """
+        Paylaşılan (ring) kareyi kameranın ekran tamponuna kopyalar; çizim
+        bu tampona yapılır, tanıma işçilerinin okuduğu kare bozulmaz.
+        """
+        if cam.display_buffer is None or cam.display_buffer.shape != frame.shape:
+            cam.display_buffer = np.empty_like(frame)
+        np.copyto(cam.display_buffer, frame)
+        return cam.display_buffer
+
+    def _draw_overlay(self, cam, frame):
+        """Adaptif kontrolcünün güncel değerlerini ve son ayar nedenini çizer."""
+        if not SHOW_PERF_OVERLAY:
+            return frame
+        for i, line in enumerate(cam.controller.overlay_lines()):
+            cv2.putText(frame, line, (10, 20 + 20 * i), FONT, 0.5, COLOR_YELLOW, 1)
+        return frame
+
+    def _tick_controller(self, cam, seq):
+        """Gösterilen kareyi kontrolcüye bildirir; ayar değiştiyse True döner."""
+        cam.controller.record_frame(seq)
+        return cam.controller.update()
+
     # --------------------------------------------------------
     def show_attendance_summary(self):
         print_header("YOKLAMA ÖZETİ")
@@ -213,38 +515,255 @@ class FaceRecognitionAttendance:
         for student in summary["students"]:
             print(" •", student)
 
+        stats = self.attendance_writer.stats()
+        print(f"\nYazıcı: {stats['depth']} bekleyen, {stats['flushes']} yazım, "
+              f"son gecikme {stats['last_latency_ms']:.1f} ms")
+
     # --------------------------------------------------------
     def run(self):
         if not self._init_camera():
+            for cam in self.cams:
+                cam.release()
             return
 
         print_info("Sistem çalışıyor... Çıkış: Q, Özet: S")
+        self.unknown_sink.start()
+        self.attendance_writer.start()
+        self.excel_export.start()
+
+        try:
+            if len(self.cams) > 1:
+                if RECOGNITION_PROCESSES > 0:
+                    print_warning("Çoklu kamerada süreç havuzu desteklenmiyor; iş parçacıkları kullanılıyor.")
+                self._run_multi_camera()
+            elif RECOGNITION_PROCESSES > 0:
+                self._run_process_pool()
+            elif RECOGNITION_WORKERS <= 0:
+                self._run_single_thread()
+            else:
+                self._run_pipeline()
+        finally:
+            for cam in self.cams:
+                if cam.motion_gate is not None:
+                    gate = cam.motion_gate
+                    print_info(f"{cam.name} hareket kapısı: {gate.skipped} kare atlandı, "
+                               f"{gate.partial} bölgesel, {gate.full} tam tarama")
+                cam.release()
+
+            self.unknown_sink.close()
+            # 🔥 Bekleyen yoklama kayıtları Excel üretiminden önce günlüğe yazılır
+            self.attendance_writer.stop()
+            self.excel_export.stop()
+            cv2.destroyAllWindows()
+
+    # --------------------------------------------------------
+    def _handle_key(self):
+        """Klavye girişini işler; çıkış istendiyse True döner."""
+        key = cv2.waitKey(1) & 0xFF
 
+        if key == ord("q") or key == 27:
+            return True
+        elif key == ord("s"):
+            self.show_attendance_summary()
+        return False
+
+    # --------------------------------------------------------
+    def _run_single_thread(self):
+        cam = self.cams[0]
         face_locations = []
         recognized = []
+        processed_frame = -cam.controller.skip
 
         while True:
-            ret, frame = self.camera.read()
+            # Aynı tampona okunur; işlem ve çizim bir sonraki okumadan önce biter
+            ret, frame = cam.camera.read(image=cam.frame_buffer)
             if not ret:
                 continue
+            cam.frame_buffer = frame
 
-            if self.frame_count % PROCESS_EVERY_N_FRAMES == 0:
-                face_locations, recognized = self._process_frame(frame)
+            if cam.frame_count - processed_frame >= cam.controller.skip:
+                face_locations, recognized = self._process_frame(cam, frame)
+                processed_frame = cam.frame_count
 
-            self.frame_count += 1
+            self._tick_controller(cam, cam.frame_count)
+            cam.frame_count += 1
 
             frame = self._draw_results(frame, face_locations, recognized)
+            frame = self._draw_overlay(cam, frame)
             cv2.imshow("Yüz Tanıma Yoklama Sistemi", frame)
 
-            key = cv2.waitKey(1) & 0xFF
-
-            if key == ord("q") or key == 27:
+            if self._handle_key():
                 break
-            elif key == ord("s"):
-                self.show_attendance_summary()
 
-        self.camera.release()
-        cv2.destroyAllWindows()
+    # --------------------------------------------------------
+    # 🔥 Kamera / tanıma / ekran ayrı iş parçacıklarında
+    def _run_pipeline(self):
+        cam = self.cams[0]
+        pipeline = RecognitionPipeline(
+            cam.camera,
+            lambda frame, seq: self._process_frame(cam, frame, seq),
+            workers=RECOGNITION_WORKERS,
+            process_every=cam.controller.skip,
+        )
+        pipeline.start()
+
+        face_locations = []
+        recognized = []
+        result_seq = -1
+        shown_seq = -1
+
+        try:
+            while True:
+                # En yeni tanıma sonucunu al (sıra numarasına göre)
+                for seq, result, _ in pipeline.results.drain():
+                    if seq > result_seq:
+                        result_seq = seq
+                        face_locations, recognized = result
+
+                # Kamera hızında en son kareyi çiz
+                seq, frame = pipeline.slot.wait_newer(shown_seq, timeout=0.1)
+                if frame is not None:
+                    shown_seq = seq
+                    cam.frame_count = seq
+                    if self._tick_controller(cam, seq):
+                        pipeline.dispatcher.min_spacing = cam.controller.skip
+
+                    # Kare tanıma işçileriyle paylaşılıyor; ekran tamponuna çiz
+                    display = self._display_copy(cam, frame)
+                    pipeline.slot.release(frame)
+                    display = self._draw_results(display, face_locations, recognized)
+                    display = self._draw_overlay(cam, display)
+                    cv2.imshow("Yüz Tanıma Yoklama Sistemi", display)
+
+                if self._handle_key():
+                    break
+        finally:
+            pipeline.stop()
+
+    # --------------------------------------------------------
+    # 🔥 Tanıma ayrı süreçlerde; kareler paylaşımlı bellek halkasıyla aktarılır
+    def _run_process_pool(self):
+        cam = self.cams[0]
+        pipeline = RecognitionPipeline(cam.camera, None, workers=0)
+        pipeline.start()
+
+        pool = None
+        face_locations = []
+        recognized = []
+        shown_seq = -1
+        submitted_seq = -cam.controller.skip
+        searched_by_seq = {}  # Gönderilen karede taranan alanlar (takip taşıma için)
+
+        try:
+            while True:
+                # Biten sonuçları sıra numarasına göre uygula
+                if pool is not None:
+                    for seq, slot, frame, result in pool.completed():
+                        try:
+                            if result is not None:
+                                cam.controller.record_latency(result["latency"])
+                                face_locations, recognized = self._apply_remote_result(
+                                    cam, frame, result, seq, searched_by_seq.get(seq)
+                                )
+                        finally:
+                            searched_by_seq.pop(seq, None)
+                            pool.release(slot)
+
+                seq, frame = pipeline.slot.wait_newer(shown_seq, timeout=0.1)
+                if frame is not None:
+                    shown_seq = seq
+                    cam.frame_count = seq
+                    self._tick_controller(cam, seq)
+
+                    # Havuz, kare boyutu belli olunca (ilk karede) kurulur
+                    if pool is None:
+                        print_info(f"{RECOGNITION_PROCESSES} tanıma süreci başlatılıyor...")
+                        pool = ProcessRecognitionPool(
+                            RECOGNITION_PROCESSES,
+                            frame.shape,
+                            {
+                                "tolerance": FACE_MATCH_TOLERANCE,
+                                "nprobe": ANN_NPROBE,
+                                "iou_threshold": TRACK_IOU_THRESHOLD,
+                                "roi_scale": ROI_SCALE,
+                                "clahe": PREPROCESS_CLAHE,
+                                "clahe_clip_limit": CLAHE_CLIP_LIMIT,
+                            },
+                        )
+
+                    # Kapı, referans kareyi tükettiği için sadece gönderilebilecekse sorulur
+                    if seq - submitted_seq >= cam.controller.skip and pool.has_capacity():
+                        scale = cam.controller.scale
+                        small = cam.preprocessor.resize(frame, scale)
+                        detect, regions = self._check_motion(cam, cam.preprocessor.gray(small), seq)
+
+                        if not detect:
+                            # Hareket yok: işçiye gönderilmez, takipler korunur
+                            submitted_seq = seq
+                            with self._state_lock:
+                                face_locations, recognized = self._visible_results(cam)
+                        else:
+                            with self._state_lock:
+                                regions, rois, searched = self._plan_detection(
+                                    cam, regions, scale, frame, seq
+                                )
+                            if pool.submit(seq, frame, self._skip_boxes(cam, seq), scale, regions, rois):
+                                submitted_seq = seq
+                                searched_by_seq[seq] = searched
+
+                    display = self._display_copy(cam, frame)
+                    pipeline.slot.release(frame)
+                    display = self._draw_results(display, face_locations, recognized)
+                    display = self._draw_overlay(cam, display)
+                    cv2.imshow("Yüz Tanıma Yoklama Sistemi", display)
+
+                if self._handle_key():
+                    break
+        finally:
+            pipeline.stop()
+            if pool is not None:
+                pool.close()
+
+    # --------------------------------------------------------
+    # 🔥 Çoklu kamera: kamera başına yakalama, ortak ve adil tanıma işçileri
+    def _run_multi_camera(self):
+        pipeline = MultiCameraPipeline(
+            [cam.camera for cam in self.cams],
+            lambda frame, key: self._process_frame(self.cams[key[0]], frame, key[1]),
+            workers=max(1, RECOGNITION_WORKERS),
+            # Her kamera, kendi denetleyicisinin başlangıç atlama değeriyle başlar
+            process_every=[cam.controller.skip for cam in self.cams],
+        )
+        pipeline.start()
+
+        try:
+            while True:
+                for (index, seq), result, _ in pipeline.results.drain():
+                    cam = self.cams[index]
+                    if seq > cam.result_seq:
+                        cam.result_seq = seq
+                        cam.face_locations, cam.recognized = result
+
+                for cam, slot in zip(self.cams, pipeline.slots):
+                    seq, frame = slot.latest(retain=False)
+                    if frame is None or seq <= cam.shown_seq:
+                        continue
+                    seq, frame = slot.latest()
+                    cam.shown_seq = seq
+                    cam.frame_count = seq
+                    if self._tick_controller(cam, seq):
+                        pipeline.scheduler.min_spacing[cam.index] = cam.controller.skip
+
+                    display = self._display_copy(cam, frame)
+                    slot.release(frame)
+                    display = self._draw_results(display, cam.face_locations, cam.recognized)
+                    display = self._draw_overlay(cam, display)
+                    cv2.imshow(f"Yüz Tanıma Yoklama Sistemi - {cam.name}", display)
+
+                if self._handle_key():
+                    break
+        finally:
+            pipeline.stop()
 
 
 # ============================================================
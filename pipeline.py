@@ -0,0 +1,947 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+PIPELINE.PY - ÇOK İŞ PARÇACIKLI KAMERA / TANIMA / GÖRÜNTÜLEME HATTI
+==============================================================================
+Kamera okuma, yüz tanıma ve ekran çizimini ayrı iş parçacıklarına böler.
+
+Aşamalar ve aralarındaki kuyruklar:
+
+    CaptureThread ──► LatestFrameSlot ──► RecognitionWorker (1..N)
+                          │                        │
+                          ▼                        ▼
+                     ekran (ana thread) ◄── DropOldestQueue (sonuçlar)
+
+Kareler her seferinde yeni dizi ayrılmadan, önceden ayrılmış bir FrameRing
+tamponuna (`camera.read(image=...)`) okunur. Aşamalar kopya değil bu
+tamponların kendisini alır; kullanılan tampon referans sayacıyla sabitlenir
+(retain/release) ve serbest kalana kadar üzerine yazılmaz. Böylece haftalarca
+açık kalan sınıf bilgisayarlarında bellek profili düz kalır.
+
+Bırakma (drop) politikaları:
+- LatestFrameSlot: sadece EN SON kare tutulur; okunmamış eski kare yeni
+  kare gelince üzerine yazılır (bayat kare birikmez)
+- DropOldestQueue: sınırlı kuyruk; doluysa EN ESKİ sonuç atılır
+
+dlib, ağır C++ çağrılarında (HOG, encoding) GIL'i bıraktığı için birden
+fazla tanıma iş parçacığı boştaki çekirdekleri gerçekten kullanır.
+
+Çok çekirdekli makinelerde tanıma aşaması ProcessRecognitionPool ile ayrı
+süreçlerde de çalıştırılabilir. Her süreç dlib modellerini ve galeriyi bir
+kez yükler; kareler pickle edilmeden multiprocessing.shared_memory
+üzerindeki halka (ring) yuvalarından okunur.
+==============================================================================
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from utils import FramePreprocessor, print_error, print_info
+
+
+class FrameRing:
+    """
+    Kamera kareleri için önceden ayrılmış, referans sayaçlı tampon halkası.
+
+    Yakalama iş parçacığı acquire() ile boş bir tampon alır ve kareyi
+    `camera.read(image=tampon)` ile doğrudan içine okur. Tamponu kullanan her
+    aşama retain()/release() ile sabitler; sayaç sıfıra inmeden tampon
+    yeniden yazılmaz. Tamponlar ilk karede (veya kare boyutu değişince)
+    kameranın döndürdüğü diziyle yerleşir; sonrasında tahsis yapılmaz.
+
+    Tampon sayısı en az (aynı anda tutulabilecek kare + 2) olmalıdır:
+    yuvadaki son kare, her tanıma işçisinin karesi, ekranın karesi ve
+    yakalamanın yazdığı kare.
+    """
+
+    def __init__(self, n_buffers: int):
+        self._buffers: List[Optional[np.ndarray]] = [None] * n_buffers
+        self._refs = [0] * n_buffers
+        self._index: Dict[int, int] = {}  # id(tampon) -> tampon no
+        self._next = 0
+        self._lock = threading.Lock()
+        self.starved = 0  # Boş tampon bulunamayan okuma sayısı
+        self.reallocated = 0  # Boyut değişimiyle yeniden ayrılan tampon sayısı
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def acquire(self) -> Optional[int]:
+        """Boş bir tampon ayırır (sayaç=1); hepsi kullanımdaysa None."""
+        with self._lock:
+            n = len(self._buffers)
+            for k in range(n):
+                i = (self._next + k) % n
+                if self._refs[i] == 0:
+                    self._refs[i] = 1
+                    self._next = (i + 1) % n
+                    return i
+            self.starved += 1
+            return None
+
+    def buffer(self, i: int) -> Optional[np.ndarray]:
+        """`read(image=...)` için tampon (ilk kareden önce None)."""
+        return self._buffers[i]
+
+    def store(self, i: int, frame: np.ndarray) -> np.ndarray:
+        """
+        Okunan kareyi tampona bağlar. read() verilen tamponu kullanamayıp yeni
+        dizi döndürdüyse (ilk kare / boyut değişimi) o dizi tampon olur.
+        """
+        with self._lock:
+            old = self._buffers[i]
+            if frame is not old:
+                if old is not None:
+                    del self._index[id(old)]
+                    self.reallocated += 1
+                self._buffers[i] = frame
+                self._index[id(frame)] = i
+        return frame
+
+    def cancel(self, i: int) -> None:
+        """acquire() ile alınıp kullanılmayan tamponu geri bırakır."""
+        with self._lock:
+            self._refs[i] = 0
+
+    def retain(self, frame: Optional[np.ndarray]) -> None:
+        with self._lock:
+            i = self._index.get(id(frame))
+            if i is not None:
+                self._refs[i] += 1
+
+    def release(self, frame: Optional[np.ndarray]) -> None:
+        with self._lock:
+            i = self._index.get(id(frame))
+            if i is not None and self._refs[i] > 0:
+                self._refs[i] -= 1
+
+
+class LatestFrameSlot:
+    """
+    Tek elemanlı "son kare" yuvası.
+
+    Her kareye artan bir sıra numarası (seq) verilir. Okuyucular belirli bir
+    numaradan daha yeni bir kare gelene kadar bekleyebilir.
+
+    `ring` verilirse kareler FrameRing tamponlarıdır: yuva son karenin bir
+    referansını tutar, latest()/wait_newer() döndürdüğü kareyi okuyucu adına
+    sabitler. Okuyucu işi bitince release() çağırmalıdır (ring yoksa no-op).
+
+    `on_put` atanırsa her yeni karede çağrılır (ör. FairScheduler'ı uyandırmak
+    için).
+    """
+
+    def __init__(self, ring: Optional[FrameRing] = None):
+        self._cond = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._seq = -1
+        self._closed = False
+        self.ring = ring
+        self.on_put: Optional[Callable[[], None]] = None
+
+    def put(self, frame: np.ndarray) -> int:
+        """
+        Yeni kareyi yazar ve sıra numarasını döndürür. Ring kullanılıyorsa
+        yazanın referansı yuvaya geçer; önceki karenin referansı bırakılır.
+        """
+        with self._cond:
+            previous = self._frame
+            self._seq += 1
+            self._frame = frame
+            if self.ring is not None:
+                self.ring.release(previous)
+            self._cond.notify_all()
+            seq = self._seq
+        if self.on_put is not None:
+            self.on_put()
+        return seq
+
+    def _retain(self, frame: Optional[np.ndarray]) -> None:
+        if self.ring is not None and frame is not None:
+            self.ring.retain(frame)
+
+    def release(self, frame: Optional[np.ndarray]) -> None:
+        """latest()/wait_newer() ile alınan kareyi bırakır."""
+        if self.ring is not None and frame is not None:
+            self.ring.release(frame)
+
+    def latest(self, retain: bool = True) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Beklemeden son kareyi döndürür: (seq, kare). `retain=False` sadece
+        sıra numarasına bakmak içindir; kare o durumda okunmamalıdır.
+        """
+        with self._cond:
+            if retain:
+                self._retain(self._frame)
+            return self._seq, self._frame
+
+    def wait_newer(
+        self,
+        after_seq: int,
+        timeout: Optional[float] = None
+    ) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        `after_seq`'ten daha yeni bir kare gelene kadar bekler.
+
+        Returns:
+            (seq, kare) — zaman aşımı veya kapanışta (-1, None)
+        """
+        with self._cond:
+            ok = self._cond.wait_for(
+                lambda: self._closed or self._seq > after_seq, timeout
+            )
+            if not ok or self._closed:
+                return -1, None
+            self._retain(self._frame)
+            return self._seq, self._frame
+
+    def close(self) -> None:
+        """Bekleyen tüm okuyucuları uyandırır."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class DropOldestQueue:
+    """
+    Sınırlı kapasiteli, bloklamayan kuyruk. Doluyken yapılan put() en eski
+    elemanı atar; üretici hiçbir zaman beklemez.
+    """
+
+    def __init__(self, maxsize: int):
+        self._items: deque = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item: Any) -> None:
+        with self._lock:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+
+    def drain(self) -> list:
+        """Kuyruktaki tüm elemanları alır ve kuyruğu boşaltır."""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            return items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class CaptureThread(threading.Thread):
+    """
+    Kameradan sürekli okuyup kareleri LatestFrameSlot'a yazan iş parçacığı.
+    Yuvanın FrameRing'i varsa kareler doğrudan halka tamponlarına okunur.
+    """
+
+    def __init__(self, camera, slot: LatestFrameSlot, stop_event: threading.Event):
+        super().__init__(name="capture", daemon=True)
+        self.camera = camera
+        self.slot = slot
+        self.stop_event = stop_event
+
+    def run(self) -> None:
+        ring = self.slot.ring
+        while not self.stop_event.is_set():
+            if ring is None:
+                ret, frame = self.camera.read()
+            else:
+                i = ring.acquire()
+                if i is None:
+                    # Tüm tamponlar tutuluyor; kare sürücüde bekler
+                    time.sleep(0.002)
+                    continue
+                ret, frame = self.camera.read(image=ring.buffer(i))
+                if ret:
+                    frame = ring.store(i, frame)
+                else:
+                    ring.cancel(i)
+            if not ret:
+                time.sleep(0.005)
+                continue
+            self.slot.put(frame)
+        self.slot.close()
+
+
+class FrameDispatcher:
+    """
+    Tanıma iş parçacıkları arasında kare paylaştırıcı.
+
+    Her işçi boşaldığında en yeni kareyi alır; ardışık iki tanıma karesi
+    arasında en az `min_spacing` kamera karesi olur (PROCESS_EVERY_N_FRAMES).
+    """
+
+    def __init__(self, slot: LatestFrameSlot, min_spacing: int = 1):
+        self.slot = slot
+        self.min_spacing = max(1, min_spacing)
+        self._lock = threading.Lock()
+        self._last_dispatched = -self.min_spacing
+        self.skipped = 0  # Tanımaya hiç girmeden geçilen kare sayısı
+
+    def next_frame(self, timeout: float = 0.5) -> Tuple[int, Optional[np.ndarray]]:
+        with self._lock:
+            seq, frame = self.slot.wait_newer(
+                self._last_dispatched + self.min_spacing - 1, timeout
+            )
+            if frame is not None:
+                if self._last_dispatched >= 0:
+                    self.skipped += seq - self._last_dispatched - 1
+                self._last_dispatched = seq
+            return seq, frame
+
+    def done(self, seq: int, seconds: float) -> None:
+        """İşlem süresi bildirimi (tek kamerada kullanılmaz)."""
+
+    def release(self, seq: int, frame: np.ndarray) -> None:
+        """next_frame() ile verilen kareyi bırakır."""
+        self.slot.release(frame)
+
+
+class FairScheduler:
+    """
+    Birden çok kameranın son karelerini ortak tanıma işçilerine paylaştırır.
+
+    CPU adil paylaşılır (start-time fair queuing): her kameranın harcadığı
+    tanıma süresi sanal saatte birikir; sıradaki iş, yeni karesi hazır olan
+    kameralar içinde en az süre harcamış olana verilir. Bir süre boşta kalan
+    kamera geri geldiğinde biriken "alacakla" diğerlerini aç bırakmaz.
+
+    next_frame() anahtar olarak (kamera_no, seq) döndürür.
+
+    Args:
+        slots: Kamera başına LatestFrameSlot
+        min_spacing: İki tanıma arası minimum kare sayısı; tek sayı veya
+            kamera başına liste
+    """
+
+    def __init__(
+        self,
+        slots: Sequence[LatestFrameSlot],
+        min_spacing: Union[int, Sequence[int]] = 1
+    ):
+        self.slots = list(slots)
+        n = len(self.slots)
+        if isinstance(min_spacing, int):
+            min_spacing = [min_spacing] * n
+        self.min_spacing = [max(1, s) for s in min_spacing]
+        self.service = [0.0] * n  # Sanal saat: kamera başına harcanan süre
+        self.skipped = [0] * n
+        self.processed = [0] * n
+        self.busy_seconds = [0.0] * n  # Gerçek tanıma süresi (istatistik)
+
+        self._cond = threading.Condition()
+        self._closed = False
+        self._vtime = 0.0
+        self._estimate = [0.05] * n
+        self._last_dispatched = [-s for s in self.min_spacing]
+
+        for slot in self.slots:
+            slot.on_put = self._notify
+
+    def _notify(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def _pick(self) -> Optional[Tuple[int, int, np.ndarray]]:
+        best = None
+        for i, slot in enumerate(self.slots):
+            seq, frame = slot.latest(retain=False)
+            if frame is None or seq < self._last_dispatched[i] + self.min_spacing[i]:
+                continue
+            if best is None or self.service[i] < self.service[best]:
+                best = i
+        if best is None:
+            return None
+        # Seçilen kameranın (bu arada yenilenmiş olabilecek) son karesi sabitlenir
+        seq, frame = self.slots[best].latest()
+        return best, seq, frame
+
+    def next_frame(self, timeout: float = 0.5) -> Tuple[Optional[Tuple[int, int]], Optional[np.ndarray]]:
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                picked = self._pick()
+                if picked is not None:
+                    i, seq, frame = picked
+                    if self._last_dispatched[i] >= 0:
+                        self.skipped[i] += seq - self._last_dispatched[i] - 1
+                    self._last_dispatched[i] = seq
+                    # Boşta kalan kamera sanal saatin gerisinden başlamaz
+                    self.service[i] = max(self.service[i], self._vtime)
+                    self._vtime = self.service[i]
+                    self.service[i] += self._estimate[i]
+                    return (i, seq), frame
+
+                remaining = deadline - time.perf_counter()
+                if self._closed or remaining <= 0:
+                    return None, None
+                self._cond.wait(remaining)
+
+    def release(self, key: Tuple[int, int], frame: np.ndarray) -> None:
+        """next_frame() ile verilen kareyi bırakır."""
+        self.slots[key[0]].release(frame)
+
+    def done(self, key: Tuple[int, int], seconds: float) -> None:
+        """Gerçek işlem süresiyle tahmini düzeltir."""
+        i = key[0]
+        with self._cond:
+            self.service[i] += seconds - self._estimate[i]
+            self._estimate[i] += 0.2 * (seconds - self._estimate[i])
+            self.processed[i] += 1
+            self.busy_seconds[i] += seconds
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class RecognitionWorker(threading.Thread):
+    """
+    Dağıtıcıdan kare alıp `process_fn(frame, seq)` çağıran ve sonucu
+    (seq, sonuç, gecikme_sn) olarak sonuç kuyruğuna yazan iş parçacığı.
+    Dağıtıcı FairScheduler ise `seq` yerine (kamera_no, seq) anahtarı gelir.
+
+    process_fn None döndürürse (ör. kare bayatladıysa) sonuç yazılmaz. Kare
+    process_fn dönene kadar sabit kalır; saklanacak parçalar kopyalanmalıdır.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        dispatcher: Any,
+        process_fn: Callable[[np.ndarray, int], Any],
+        results: DropOldestQueue,
+        stop_event: threading.Event
+    ):
+        super().__init__(name=f"recognition-{index}", daemon=True)
+        self.dispatcher = dispatcher
+        self.process_fn = process_fn
+        self.results = results
+        self.stop_event = stop_event
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            seq, frame = self.dispatcher.next_frame()
+            if frame is None:
+                continue
+            start = time.perf_counter()
+            try:
+                result = self.process_fn(frame, seq)
+            except Exception as e:
+                print_error(f"{self.name}: kare işlenemedi: {str(e)}")
+                continue
+            finally:
+                self.dispatcher.release(seq, frame)
+                self.dispatcher.done(seq, time.perf_counter() - start)
+            if result is not None:
+                self.results.put((seq, result, time.perf_counter() - start))
+
+
+class AdaptiveFrameController:
+    """
+    Kare atlama aralığını (ve istenirse küçültme oranını) çalışma anında
+    ölçülen tanıma gecikmesi ile kamera FPS'ine göre ayarlar.
+
+    - Gecikme bütçesi: tek bir tanımanın süresi `latency_budget` saniyeyi
+      aşarsa ölçek küçültülür (HOG maliyeti piksel sayısıyla, yani ölçeğin
+      karesiyle orantılıdır); bol pay varsa tekrar büyütülür
+    - CPU bütçesi: tanıma işçilerinin meşgul oranı `cpu_budget`'ı
+      geçmeyecek şekilde atlama aralığı seçilir. İşçiler `cameras` kamera
+      arasında paylaşılıyorsa her kameraya düşen pay workers / cameras'tır:
+          skip = ceil(fps * gecikme * kamera / (işçi * cpu_budget))
+
+    Her değişiklik nedeniyle birlikte loglanır; güncel değerler ve son neden
+    overlay_lines() ile ekrana çizilebilir.
+
+    Args:
+        skip: Başlangıç atlama aralığı (PROCESS_EVERY_N_FRAMES)
+        scale: Başlangıç küçültme oranı (SCALE_FACTOR)
+        workers: Paralel tanıma işçisi sayısı (tüm kameralar için toplam)
+        cameras: İşçileri paylaşan kamera sayısı
+        latency_budget: Tek tanıma için hedef süre (saniye)
+        cpu_budget: İşçilerin hedef meşguliyet oranı (0-1)
+        adapt_scale: Ölçek de ayarlansın mı
+        enabled: False ise sadece ölçüm yapılır, değerler değişmez
+    """
+
+    def __init__(
+        self,
+        skip: int = 4,
+        scale: float = 0.25,
+        workers: int = 1,
+        cameras: int = 1,
+        latency_budget: float = 0.25,
+        cpu_budget: float = 0.75,
+        min_skip: int = 1,
+        max_skip: int = 15,
+        min_scale: float = 0.15,
+        max_scale: float = 0.5,
+        scale_step: float = 0.05,
+        adapt_scale: bool = True,
+        enabled: bool = True,
+        adjust_interval: float = 2.0,
+        smoothing: float = 0.2
+    ):
+        self.skip = int(skip)
+        self.scale = float(scale)
+        self.workers = max(1, workers)
+        self.cameras = max(1, cameras)
+        self.latency_budget = latency_budget
+        self.cpu_budget = cpu_budget
+        self.min_skip = min_skip
+        self.max_skip = max_skip
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.scale_step = scale_step
+        self.adapt_scale = adapt_scale
+        self.enabled = enabled
+        self.adjust_interval = adjust_interval
+        self.smoothing = smoothing
+
+        self.latency: Optional[float] = None  # EMA, saniye
+        self.fps: Optional[float] = None  # EMA, kamera karesi / saniye
+        self.reason = "baslangic ayarlari"
+
+        self._last_seq: Optional[int] = None
+        self._last_seq_time: Optional[float] = None
+        self._last_adjust: Optional[float] = None
+
+    def _ema(self, old: Optional[float], value: float) -> float:
+        return value if old is None else old + self.smoothing * (value - old)
+
+    def record_frame(self, seq: int, now: Optional[float] = None) -> None:
+        """Gösterilen karenin sıra numarasından kamera FPS'ini ölçer."""
+        now = time.perf_counter() if now is None else now
+        if self._last_seq is not None and seq > self._last_seq:
+            elapsed = now - self._last_seq_time
+            if elapsed > 0:
+                self.fps = self._ema(self.fps, (seq - self._last_seq) / elapsed)
+        self._last_seq, self._last_seq_time = seq, now
+
+    def record_latency(self, seconds: float) -> None:
+        """Bir tanımanın süresini kaydeder."""
+        self.latency = self._ema(self.latency, seconds)
+
+    def update(self, now: Optional[float] = None) -> bool:
+        """
+        Ayar aralığı dolduysa skip/ölçeği yeniden hesaplar.
+
+        Returns:
+            bool: Değerlerden biri değiştiyse True
+        """
+        now = time.perf_counter() if now is None else now
+        if not self.enabled or self.latency is None or self.fps is None:
+            return False
+        if self._last_adjust is None:
+            self._last_adjust = now
+        if now - self._last_adjust < self.adjust_interval:
+            return False
+        self._last_adjust = now
+
+        latency_ms = self.latency * 1000
+        budget_ms = self.latency_budget * 1000
+
+        # 1) Gecikme bütçesi → ölçek
+        if self.adapt_scale:
+            old = self.scale
+            bigger = min(self.max_scale, round(self.scale + self.scale_step, 3))
+            # Büyük ölçekte beklenen gecikme (piksel sayısı ~ ölçek²)
+            expected_bigger = self.latency * (bigger / self.scale) ** 2
+
+            if self.latency > self.latency_budget and self.scale > self.min_scale:
+                self.scale = max(self.min_scale, round(self.scale - self.scale_step, 3))
+                reason = f"gecikme {latency_ms:.0f}ms > butce {budget_ms:.0f}ms"
+            elif bigger > self.scale and expected_bigger < 0.8 * self.latency_budget:
+                self.scale = bigger
+                reason = f"gecikme {latency_ms:.0f}ms, butcede pay var"
+            else:
+                reason = None
+
+            if reason is not None:
+                self.reason = f"{reason}: olcek {old:.2f}->{self.scale:.2f}"
+                print_info(f"Adaptif ayar: {self.reason}")
+                # Yeni ölçeğin gecikmesi baştan ölçülsün
+                self.latency = None
+                return True
+
+        # 2) CPU bütçesi → atlama aralığı
+        needed = self.fps * self.latency * self.cameras / (self.workers * self.cpu_budget)
+        skip = int(min(self.max_skip, max(self.min_skip, np.ceil(needed))))
+        if skip != self.skip:
+            old = self.skip
+            self.skip = skip
+            self.reason = (f"kamera {self.fps:.0f}fps, gecikme {latency_ms:.0f}ms, "
+                           f"CPU %{self.cpu_budget * 100:.0f}: skip {old}->{skip}")
+            print_info(f"Adaptif ayar: {self.reason}")
+            return True
+
+        return False
+
+    def overlay_lines(self) -> List[str]:
+        """Ekrana çizilecek durum satırları (cv2.putText ASCII dışını çizemez)."""
+        latency = "-" if self.latency is None else f"{self.latency * 1000:.0f}ms"
+        fps = "-" if self.fps is None else f"{self.fps:.0f}"
+        mode = "adaptif" if self.enabled else "sabit"
+        return [
+            f"[{mode}] her {self.skip} karede 1 | olcek {self.scale:.2f}",
+            f"gecikme {latency} | kamera {fps} fps",
+            self.reason,
+        ]
+
+
+class RecognitionPipeline:
+    """
+    Kamera, tanıma işçileri ve sonuç kuyruğunu bir arada başlatıp durdurur.
+
+    Görüntüleme aşaması çağıranın (ana thread) döngüsündedir; bazı
+    platformlarda (macOS) cv2.imshow yalnızca ana thread'den çağrılabilir.
+
+    workers=0 ise yalnızca kamera thread'i çalışır (tanıma başka yerde, ör.
+    ProcessRecognitionPool ile yapılıyorsa).
+
+    Kareler FrameRing tamponlarıdır; slot'tan kare alan çağıran işi bitince
+    `slot.release(kare)` çağırmalıdır.
+    """
+
+    def __init__(
+        self,
+        camera,
+        process_fn: Callable[[np.ndarray, int], Any],
+        workers: int = 2,
+        process_every: int = 1,
+        result_queue_size: int = 8
+    ):
+        self.stop_event = threading.Event()
+        # Yuva + işçi başına bir kare + ekran + yakalama + pay
+        self.ring = FrameRing(workers + 4)
+        self.slot = LatestFrameSlot(self.ring)
+        self.results = DropOldestQueue(result_queue_size)
+        self.dispatcher = FrameDispatcher(self.slot, process_every)
+
+        self.capture = CaptureThread(camera, self.slot, self.stop_event)
+        self.workers = [
+            RecognitionWorker(i, self.dispatcher, process_fn, self.results, self.stop_event)
+            for i in range(workers)
+        ]
+
+    def start(self) -> None:
+        self.capture.start()
+        for worker in self.workers:
+            worker.start()
+        print_info(f"Pipeline başlatıldı: 1 kamera + {len(self.workers)} tanıma iş parçacığı")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self.stop_event.set()
+        self.slot.close()
+        self.capture.join(timeout)
+        for worker in self.workers:
+            worker.join(timeout)
+        print_info(f"Pipeline durduruldu (tanınmadan geçilen kare: {self.dispatcher.skipped}, "
+                   f"atılan sonuç: {self.results.dropped}, tampon bekleme: {self.ring.starved}, "
+                   f"yeniden ayrılan tampon: {self.ring.reallocated})")
+
+
+class MultiCameraPipeline:
+    """
+    Birden çok kamera için ortak tanıma hattı: kamera başına bir
+    CaptureThread, tek bir FairScheduler ve ortak tanıma işçileri.
+
+    Sonuç kuyruğundaki anahtarlar (kamera_no, seq) biçimindedir.
+    """
+
+    def __init__(
+        self,
+        cameras: Sequence[Any],
+        process_fn: Callable[[np.ndarray, Tuple[int, int]], Any],
+        workers: int = 2,
+        process_every: Union[int, Sequence[int]] = 1,
+        result_queue_size: int = 16
+    ):
+        self.stop_event = threading.Event()
+        # İşçiler aynı kameranın karelerini aynı anda tutabilir
+        self.rings = [FrameRing(max(1, workers) + 4) for _ in cameras]
+        self.slots = [LatestFrameSlot(ring) for ring in self.rings]
+        self.results = DropOldestQueue(result_queue_size)
+        self.scheduler = FairScheduler(self.slots, process_every)
+
+        self.captures = [
+            CaptureThread(camera, slot, self.stop_event)
+            for camera, slot in zip(cameras, self.slots)
+        ]
+        for i, capture in enumerate(self.captures):
+            capture.name = f"capture-{i}"
+        self.workers = [
+            RecognitionWorker(i, self.scheduler, process_fn, self.results, self.stop_event)
+            for i in range(max(1, workers))
+        ]
+
+    def start(self) -> None:
+        for thread in self.captures + self.workers:
+            thread.start()
+        print_info(f"Pipeline başlatıldı: {len(self.captures)} kamera + "
+                   f"{len(self.workers)} ortak tanıma iş parçacığı")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self.stop_event.set()
+        self.scheduler.close()
+        for slot in self.slots:
+            slot.close()
+        for thread in self.captures + self.workers:
+            thread.join(timeout)
+        scheduler = self.scheduler
+        for i in range(len(self.slots)):
+            print_info(f"Kamera {i}: {scheduler.processed[i]} kare tanındı, "
+                       f"{scheduler.skipped[i]} atlandı, tanıma süresi "
+                       f"{scheduler.busy_seconds[i]:.1f} sn, tampon bekleme "
+                       f"{self.rings[i].starved}")
+
+
+# ============================================================================
+# SÜREÇ HAVUZU (PROCESS POOL) + PAYLAŞIMLI BELLEK HALKASI
+# ============================================================================
+class SharedFrameRing:
+    """
+    multiprocessing.shared_memory üzerinde sabit sayıda kare yuvası.
+
+    Ana süreç boş bir yuvaya kareyi kopyalar ve işçiye sadece yuva
+    numarasını gönderir; işçi aynı belleği kopyasız okur. Yuva, sonucu ana
+    süreçte uygulanana kadar (bilinmeyen yüz kırpma vb. için) dolu kalır.
+    """
+
+    def __init__(self, n_slots: int, shape: Tuple[int, ...], dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = int(np.prod(self.shape)) * self.dtype.itemsize * n_slots
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.frames = np.ndarray((n_slots,) + self.shape, self.dtype, buffer=self.shm.buf)
+        self._free = deque(range(n_slots))
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, frame: np.ndarray) -> Optional[int]:
+        """Kareyi boş bir yuvaya kopyalar; boş yuva yoksa None (kare atılır)."""
+        with self._lock:
+            if not self._free:
+                return None
+            slot = self._free.popleft()
+        np.copyto(self.frames[slot], frame)
+        return slot
+
+    def view(self, slot: int) -> np.ndarray:
+        return self.frames[slot]
+
+    def release(self, slot: int) -> None:
+        with self._lock:
+            self._free.append(slot)
+
+    def close(self) -> None:
+        # ndarray görünümü bellek tamponunu tuttuğu için önce bırakılır
+        self.frames = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+# İşçi süreç içi durum (her süreçte bir kez doldurulur)
+_WORKER: Dict[str, Any] = {}
+
+
+def _pool_worker_init(
+    shm_name: str,
+    n_slots: int,
+    shape: Tuple[int, ...],
+    dtype: str,
+    config: Dict[str, Any]
+) -> None:
+    """İşçi süreç başlatıcı: dlib modellerini ve galeriyi bir kez yükler."""
+    import face_recognition
+    from gallery import FaceGallery
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _WORKER["shm"] = shm
+    _WORKER["frames"] = np.ndarray((n_slots,) + tuple(shape), np.dtype(dtype), buffer=shm.buf)
+    _WORKER["face_recognition"] = face_recognition
+    _WORKER["gallery"] = FaceGallery.load() or FaceGallery.empty()
+    _WORKER["config"] = config
+    _WORKER["preprocessor"] = FramePreprocessor(
+        clahe=config.get("clahe", False),
+        clip_limit=config.get("clahe_clip_limit", 2.0),
+    )
+
+
+def _pool_recognize(
+    seq: int,
+    slot: int,
+    skip_boxes: Sequence[Tuple[int, int, int, int]],
+    scale: float,
+    regions: Optional[Sequence[Tuple[int, int, int, int]]] = None,
+    rois: Sequence[Tuple[int, int, int, int]] = ()
+):
+    """
+    İşçi süreçte bir kareyi tanır.
+
+    `skip_boxes` ile yeterli IoU'ya sahip yüzler (ana süreçte güvenle
+    takip edilenler) için encoding hesaplanmaz. `regions` verilirse
+    (hareket kapısı) algılama sadece bu küçük-kare bölgelerinde yapılır;
+    `rois` tam kare bölgeleri yüksek çözünürlükte (mozaik) yeniden taranır.
+
+    Returns:
+        (seq, slot, {"boxes", "encoded", "encodings", "rows", "distances",
+                     "accepted", "latency"})
+    """
+    from detection import detect_faces, encode_detected
+    from tracker import iou_matrix
+
+    fr = _WORKER["face_recognition"]
+    gallery = _WORKER["gallery"]
+    cfg = _WORKER["config"]
+    preprocess = _WORKER["preprocessor"]
+    start = time.perf_counter()
+
+    frame = _WORKER["frames"][slot]
+    rgb_small = preprocess(preprocess.resize(frame, scale))
+    faces, images = detect_faces(
+        fr.face_locations, rgb_small, scale,
+        regions=regions, frame=frame, rois=rois, roi_scale=cfg["roi_scale"],
+        preprocessor=preprocess,
+    )
+    boxes = [box for box, _, _ in faces]
+
+    encoded = list(range(len(boxes)))
+    if boxes and skip_boxes:
+        best_iou = iou_matrix(boxes, skip_boxes).max(axis=1)
+        encoded = [i for i in encoded if best_iou[i] < cfg["iou_threshold"]]
+
+    encodings = encode_detected(fr.face_encodings, images, faces, encoded)
+    rows, dist, accepted = gallery.match(
+        encodings,
+        tolerance=cfg["tolerance"],
+        nprobe=cfg["nprobe"],
+    )
+
+    return seq, slot, {
+        "boxes": boxes,
+        "encoded": encoded,
+        # Bilinmeyen yüz kümelemesi için (ana süreçteki kaydediciye)
+        "encodings": np.asarray(encodings, dtype=np.float32).reshape(-1, 128),
+        "rows": rows.tolist(),
+        "distances": dist.tolist(),
+        "accepted": accepted.tolist(),
+        "latency": time.perf_counter() - start,
+    }
+
+
+class ProcessRecognitionPool:
+    """
+    Tanımayı işçi süreçlerde yapan havuz.
+
+    - submit(): kareyi paylaşımlı halkaya yazar, işçiye yuva numarası gönderir
+    - completed(): biten sonuçları sıra numarasına (seq) göre, henüz bitmemiş
+      daha eski bir kare kalmayacak şekilde sıralı döndürür
+
+    Args:
+        processes: İşçi süreç sayısı
+        frame_shape: Kamera karesinin şekli (ör. (480, 640, 3))
+        config: İşçilere iletilen ayarlar (tolerance, nprobe, iou_threshold,
+            roi_scale, clahe, clahe_clip_limit)
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        frame_shape: Tuple[int, ...],
+        config: Dict[str, Any],
+        dtype=np.uint8
+    ):
+        self.processes = max(1, processes)
+        # İşte olanlar + sıralama bekleyenler için yeterli yuva
+        self.ring = SharedFrameRing(self.processes * 2 + 2, frame_shape, dtype)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_pool_worker_init,
+            initargs=(self.ring.name, len(self.ring.frames), tuple(frame_shape),
+                      np.dtype(dtype).str, config),
+        )
+
+        self._lock = threading.Lock()
+        self._in_flight: Dict[int, int] = {}  # seq -> slot
+        self._done: Dict[int, Tuple[int, Any]] = {}  # seq -> (slot, sonuç)
+        self.dropped = 0
+        self.failed = 0
+
+    def has_capacity(self) -> bool:
+        with self._lock:
+            return len(self._in_flight) < self.processes
+
+    def submit(
+        self,
+        seq: int,
+        frame: np.ndarray,
+        skip_boxes: Sequence[Tuple[int, int, int, int]] = (),
+        scale: float = 0.25,
+        regions: Optional[Sequence[Tuple[int, int, int, int]]] = None,
+        rois: Sequence[Tuple[int, int, int, int]] = ()
+    ) -> bool:
+        """Kareyi işçilere gönderir; yer yoksa kare atılır ve False döner."""
+        if not self.has_capacity():
+            return False
+
+        slot = self.ring.write(frame)
+        if slot is None:
+            self.dropped += 1
+            return False
+
+        with self._lock:
+            self._in_flight[seq] = slot
+        future = self.executor.submit(
+            _pool_recognize, seq, slot, list(skip_boxes), scale, regions, list(rois)
+        )
+        future.add_done_callback(lambda f, seq=seq, slot=slot: self._on_done(f, seq, slot))
+        return True
+
+    def _on_done(self, future, seq: int, slot: int) -> None:
+        try:
+            _, _, result = future.result()
+        except Exception as e:
+            print_error(f"İşçi süreç hatası (kare {seq}): {str(e)}")
+            self.failed += 1
+            result = None
+        with self._lock:
+            self._in_flight.pop(seq, None)
+            self._done[seq] = (slot, result)
+
+    def completed(self) -> List[Tuple[int, int, np.ndarray, Any]]:
+        """
+        Uygulanmaya hazır sonuçları seq sırasıyla döndürür:
+        [(seq, yuva, kare_görünümü, sonuç), ...]. Sonuç uygulandıktan sonra
+        yuva release() ile serbest bırakılmalıdır.
+        """
+        with self._lock:
+            oldest_running = min(self._in_flight) if self._in_flight else None
+            ready = sorted(
+                seq for seq in self._done
+                if oldest_running is None or seq < oldest_running
+            )
+            items = [(seq,) + self._done.pop(seq) for seq in ready]
+
+        return [(seq, slot, self.ring.view(slot), result) for seq, slot, result in items]
+
+    def release(self, slot: int) -> None:
+        self.ring.release(slot)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.ring.close()
+        print_info(f"Süreç havuzu kapatıldı (atılan kare: {self.dropped}, hata: {self.failed})")
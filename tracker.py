@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+TRACKER.PY - ALGILAMALAR ARASI YÜZ TAKİBİ
+==============================================================================
+Ardışık algılama karelerindeki yüz kutularını IoU (kesişim / birleşim)
+ile eşleştirerek her kişiye kalıcı bir takip numarası (track id) verir.
+
+Amaç: 128-D encoding'i (dlib) her algılamada değil, yalnızca gerektiğinde
+hesaplamak:
+- Takip yeni ise
+- Son eşleşme düşük güvenli ise (mesafe eşiğe yakın)
+- Periyodik doğrulama zamanı geldiyse
+
+Tanınmış takipler isim ve numaralarını taşır; kutu ve etiket her karede
+yeniden tanıma yapılmadan çizilir.
+==============================================================================
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Box = Tuple[int, int, int, int]  # (top, right, bottom, left) — face_recognition düzeni
+
+UNKNOWN_NAME = "Bilinmeyen"
+
+
+def iou_matrix(boxes_a: Sequence[Box], boxes_b: Sequence[Box]) -> np.ndarray:
+    """
+    İki kutu kümesi arasındaki IoU matrisini vektörize hesaplar.
+
+    Returns:
+        np.ndarray: (len(a) x len(b)) IoU değerleri
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+
+    inter = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    area_a = (a[:, 1] - a[:, 3]) * (a[:, 2] - a[:, 0])
+    area_b = (b[:, 1] - b[:, 3]) * (b[:, 2] - b[:, 0])
+    union = area_a[:, None] + area_b[None, :] - inter
+
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class FaceTrack:
+    """
+    Tek bir kişinin kareler arası takibi.
+
+    Attributes:
+        track_id: Kalıcı takip numarası
+        box: Son bilinen kutu (tam kare koordinatları)
+        name: Tanınan isim (tanınmadıysa "Bilinmeyen")
+        student_id: Tanınan öğrenci numarası veya None
+        distance: Son eşleşme mesafesi (encoding hiç hesaplanmadıysa inf)
+        last_encoded: Encoding'in son hesaplandığı kare numarası
+        misses: Art arda eşleşmeyen algılama sayısı
+    """
+
+    def __init__(self, track_id: int, box: Box):
+        self.track_id = track_id
+        self.box = box
+        self.name = UNKNOWN_NAME
+        self.student_id: Optional[str] = None
+        self.distance = float("inf")
+        self.last_encoded: Optional[int] = None
+        self.misses = 0
+
+    @property
+    def identified(self) -> bool:
+        return self.student_id is not None
+
+
+class FaceTracker:
+    """
+    IoU tabanlı basit çoklu yüz takipçisi.
+
+    Args:
+        iou_threshold: Aynı kişi sayılması için minimum IoU
+        max_misses: Takibin silinmeden önce kaçırabileceği algılama sayısı
+        confident_distance: Bu mesafenin altındaki eşleşmeler güvenli sayılır
+        reverify_every: Güvenli takiplerin yeniden doğrulanma aralığı (kare)
+        unknown_retry_every: Bilinmeyen takiplerin yeniden denenme aralığı (kare)
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_misses: int = 2,
+        confident_distance: float = 0.42,
+        reverify_every: int = 90,
+        unknown_retry_every: int = 12
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.confident_distance = confident_distance
+        self.reverify_every = reverify_every
+        self.unknown_retry_every = unknown_retry_every
+
+        self.tracks: List[FaceTrack] = []
+        self._next_id = 1
+
+    # --------------------------------------------------------
+    def update(self, boxes: Sequence[Box]) -> List[FaceTrack]:
+        """
+        Yeni algılanan kutuları mevcut takiplerle eşleştirir.
+
+        - En yüksek IoU'lu çiftler açgözlü (greedy) şekilde eşleştirilir
+        - Eşleşmeyen kutular için yeni takip açılır
+        - Eşleşmeyen takiplerin kaçırma sayacı artar, sınırı aşanlar silinir
+
+        Returns:
+            List[FaceTrack]: `boxes` ile aynı sırada takipler
+        """
+        assigned: List[Optional[FaceTrack]] = [None] * len(boxes)
+        matched_tracks = set()
+
+        if self.tracks and len(boxes):
+            ious = iou_matrix([t.box for t in self.tracks], boxes)
+            track_idx, box_idx = np.nonzero(ious >= self.iou_threshold)
+            for k in np.argsort(-ious[track_idx, box_idx], kind="stable"):
+                ti, bi = int(track_idx[k]), int(box_idx[k])
+                if ti in matched_tracks or assigned[bi] is not None:
+                    continue
+                track = self.tracks[ti]
+                track.box = tuple(boxes[bi])
+                track.misses = 0
+                assigned[bi] = track
+                matched_tracks.add(ti)
+
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        for bi, box in enumerate(boxes):
+            if assigned[bi] is None:
+                track = FaceTrack(self._next_id, tuple(box))
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[bi] = track
+
+        return assigned
+
+    def needs_encoding(self, track: FaceTrack, frame_no: int) -> bool:
+        """
+        Takip için dlib encoding'inin bu karede hesaplanması gerekiyor mu?
+        """
+        if track.last_encoded is None:
+            return True
+        age = frame_no - track.last_encoded
+        if not track.identified:
+            return age >= self.unknown_retry_every
+        if track.distance > self.confident_distance:
+            return True
+        return age >= self.reverify_every
+
+    def assign_identity(
+        self,
+        track: FaceTrack,
+        name: str,
+        student_id: Optional[str],
+        distance: float,
+        frame_no: int
+    ) -> None:
+        """Encoding sonucunu takibe yazar."""
+        track.name = name
+        track.student_id = student_id
+        track.distance = float(distance)
+        track.last_encoded = frame_no
+
+    def visible_tracks(self) -> List[FaceTrack]:
+        """Son algılamada görülen takipler (çizim için)."""
+        return [t for t in self.tracks if t.misses == 0]
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+==============================================================================
+UNKNOWN_SINK.PY - ARKA PLANDA ÇALIŞAN BİLİNMEYEN YÜZ KAYDEDİCİ
+==============================================================================
+Tanınmayan yüzlerin kırpıntıları ve encoding'leri bir kuyruk üzerinden ayrı
+bir iş parçacığına gönderilir; JPEG sıkıştırma ve disk yazımı kare döngüsünü
+hiçbir zaman bekletmez (kuyruk doluysa örnek atılır).
+
+Aynı kişinin yüzlerce kopyasını kaydetmemek için örnekler encoding
+mesafesine göre çevrimiçi kümelenir:
+- En yakın küme merkezi `cluster_distance` içindeyse örnek o kümeye eklenir
+  ve merkez güncellenir; aksi halde yeni kişi (küme) açılır
+- Her kişi için en fazla `max_per_cluster` fotoğraf, aralarında en az
+  `min_interval` saniye olacak şekilde kaydedilir
+
+Küme merkezleri kapanışta unknown/_clusters.npz dosyasına yazılır ve
+açılışta geri yüklenir; böylece aynı yabancı sonraki derslerde tekrar
+kaydedilmez. Kaydedici çalıştığı sürece unknown/_sink.lock kilidini tutar;
+compact_unknown.py --apply bu sırada küme dosyasına yazmayı reddeder
+(kapanışta kaydedicinin yazımı sıkıştırmanın sonucunu ezerdi).
+==============================================================================
+"""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List
+
+import cv2
+import numpy as np
+
+from utils import BASE_DIR, FileLock, face_distance_matrix, print_error, print_info, print_warning
+
+UNKNOWN_DIR = os.path.join(BASE_DIR, "unknown")
+CLUSTERS_FILE_NAME = "_clusters.npz"
+SINK_LOCK_NAME = "_sink.lock"  # Kaydedici çalışırken tutulur
+
+
+def sink_lock(directory: str = UNKNOWN_DIR, blocking: bool = True) -> FileLock:
+    """Kaydedicinin çalışma kilidi; blocking=False ise doluysa BlockingIOError."""
+    return FileLock(os.path.join(directory, SINK_LOCK_NAME), blocking=blocking)
+
+
+class UnknownFaceSink(threading.Thread):
+    """
+    Bilinmeyen yüzleri kümeleyip kişi başına sınırlı sayıda kaydeden arka
+    plan iş parçacığı.
+
+    Args:
+        directory: Fotoğrafların yazılacağı klasör
+        cluster_distance: Aynı kişi sayılma mesafesi (128-D Öklid)
+        max_per_cluster: Kişi başına en fazla kaydedilecek fotoğraf
+        min_interval: Aynı kişinin iki fotoğrafı arasındaki en kısa süre (sn)
+        queue_size: Bekleyen örnek sınırı (doluysa yeni örnek atılır)
+        jpeg_quality: cv2.IMWRITE_JPEG_QUALITY
+    """
+
+    def __init__(
+        self,
+        directory: str = UNKNOWN_DIR,
+        cluster_distance: float = 0.5,
+        max_per_cluster: int = 3,
+        min_interval: float = 10.0,
+        queue_size: int = 64,
+        jpeg_quality: int = 90
+    ):
+        super().__init__(name="unknown-sink", daemon=True)
+        self.directory = directory
+        self.cluster_distance = cluster_distance
+        self.max_per_cluster = max_per_cluster
+        self.min_interval = min_interval
+        self.jpeg_quality = jpeg_quality
+        self.clusters_file = os.path.join(directory, CLUSTERS_FILE_NAME)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+
+        # Küme durumu (yalnızca bu iş parçacığı değiştirir)
+        self.centroids = np.zeros((0, 128), dtype=np.float32)
+        self.members: List[int] = []  # Kümeye düşen örnek sayısı
+        self.saved: List[int] = []  # Kümeden kaydedilen fotoğraf sayısı
+        self._last_saved: List[float] = []
+
+        # İstatistik
+        self.received = 0
+        self.dropped = 0
+        self.written = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_clusters()
+
+    # --------------------------------------------------------
+    def submit(self, crop: np.ndarray, encoding: np.ndarray) -> bool:
+        """
+        Kırpıntıyı ve encoding'i kuyruğa ekler; asla beklemez.
+
+        Kırpıntı çağıranın karesinden (ring tamponu) kopyalanır.
+
+        Returns:
+            bool: Kuyruk doluysa False (örnek atılır)
+        """
+        if crop is None or crop.size == 0 or encoding is None:
+            return False
+        try:
+            self._queue.put_nowait((crop.copy(), np.asarray(encoding, dtype=np.float32)))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.received += 1
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Kuyruktaki örnekleri bitirir, küme merkezlerini kaydeder."""
+        self._queue.put(None)
+        self.join(timeout)
+        print_info(f"Bilinmeyen yüzler: {self.received} örnek, {len(self.members)} kişi, "
+                   f"{self.written} fotoğraf kaydedildi, {self.dropped} örnek atıldı")
+
+    # --------------------------------------------------------
+    def run(self) -> None:
+        # Kapanıştaki küme yazımı dahil kilit tutulur (compact_unknown.py bekler)
+        with sink_lock(self.directory):
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                try:
+                    self._handle(*item)
+                except Exception as e:
+                    print_error(f"Bilinmeyen yüz kaydedilemedi: {str(e)}")
+            self._save_clusters()
+
+    def _assign(self, encoding: np.ndarray) -> int:
+        """Örneği en yakın kümeye ekler veya yeni küme açar; küme no döner."""
+        if len(self.centroids):
+            distances = face_distance_matrix(self.centroids, encoding[None, :])[0]
+            best = int(np.argmin(distances))
+            if distances[best] <= self.cluster_distance:
+                # Artımlı ortalama: merkez kişinin tüm örneklerini temsil eder
+                self.members[best] += 1
+                self.centroids[best] += (encoding - self.centroids[best]) / self.members[best]
+                return best
+
+        self.centroids = np.vstack([self.centroids, encoding[None, :]])
+        self.members.append(1)
+        self.saved.append(0)
+        self._last_saved.append(-np.inf)
+        return len(self.members) - 1
+
+    def _handle(self, crop: np.ndarray, encoding: np.ndarray) -> None:
+        cluster = self._assign(encoding)
+        now = time.monotonic()
+
+        if self.saved[cluster] >= self.max_per_cluster:
+            return
+        if now - self._last_saved[cluster] < self.min_interval:
+            return
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(
+            self.directory,
+            f"unknown_{timestamp}_k{cluster:04d}_{self.saved[cluster] + 1}.jpg",
+        )
+        if not cv2.imwrite(path, crop, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]):
+            print_error(f"Fotoğraf yazılamadı: {path}")
+            return
+
+        self.saved[cluster] += 1
+        self._last_saved[cluster] = now
+        self.written += 1
+        if self.saved[cluster] == 1:
+            print_warning(f"Yeni bilinmeyen kişi (#{cluster}) – fotoğraf kaydedildi.")
+
+    # --------------------------------------------------------
+    def _load_clusters(self) -> None:
+        if not os.path.exists(self.clusters_file):
+            return
+        try:
+            with np.load(self.clusters_file) as data:
+                self.centroids = data["centroids"].astype(np.float32).reshape(-1, 128)
+                self.members = data["members"].astype(int).tolist()
+                self.saved = data["saved"].astype(int).tolist()
+            self._last_saved = [-np.inf] * len(self.members)
+            print_info(f"{len(self.members)} bilinen yabancı kümesi yüklendi.")
+        except Exception as e:
+            print_warning(f"Küme dosyası okunamadı, sıfırdan başlanıyor: {str(e)}")
+            self.centroids = np.zeros((0, 128), dtype=np.float32)
+            self.members, self.saved, self._last_saved = [], [], []
+
+    def _save_clusters(self) -> None:
+        try:
+            # Yarım yazılmış dosya kalmasın: geçici dosya + atomik yer değiştirme
+            tmp = self.clusters_file + ".tmp.npz"
+            np.savez(
+                tmp,
+                centroids=self.centroids,
+                members=np.asarray(self.members, dtype=np.int64),
+                saved=np.asarray(self.saved, dtype=np.int64),
+            )
+            os.replace(tmp, self.clusters_file)
+        except Exception as e:
+            print_error(f"Küme dosyası kaydedilemedi: {str(e)}")
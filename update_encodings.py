@@ -9,7 +9,9 @@ os.chdir(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import face_recognition
-from utils import get_dataset_images, save_encodings
+from ann_index import build_and_save_index
+from gallery import FaceGallery
+from utils import get_dataset_images
 
 def main():
     images = get_dataset_images()
@@ -37,8 +39,13 @@ def main():
     print(f'\n{len(all_encodings)} encodings created')
     
     if all_encodings:
-        save_encodings(all_encodings, all_names, all_ids)
-        print('Encodings saved successfully!')
+        gallery = FaceGallery(all_encodings, all_names, all_ids)
+        if gallery.save():
+            # Eski indeks yeni galeriyle eşleşmez; encode_faces.py gibi yeniden oluştur
+            build_and_save_index(gallery.centroids, force='--ann' in sys.argv)
+            print('Encodings saved successfully!')
+        else:
+            print('Encodings could not be saved!')
     else:
         print('No encodings to save!')
 